@@ -0,0 +1,163 @@
+"""Maintenance commands.
+
+Run with ``python -m app.cli <command>``.
+"""
+
+import argparse
+import asyncio
+from datetime import date, datetime
+
+from sqlalchemy import or_, select, update
+
+from app.config import settings
+from app.core.audit_partitions import (
+    add_months,
+    archive_partition,
+    ensure_audit_partitions,
+    monthly_partitions,
+)
+from app.core.index_entries import compact_index, upgrade_index_entries_table
+from app.core.storage import LocalBlobStore, PostgresBlobStore, upgrade_files_table
+from app.core.upload_sessions import purge_expired_upload_sessions
+from app.db import AsyncSessionLocal, engine
+from app.models import File, User
+
+
+async def migrate_blobs(batch_size: int) -> None:
+    """Move ciphertext out of ``files.ciphertext`` into the local blob store."""
+    async with engine.begin() as conn:
+        await upgrade_files_table(conn)
+
+    store = LocalBlobStore()
+    moved = 0
+    pending = File.ciphertext.is_not(None) & or_(
+        File.blob_ref.is_(None),
+        File.blob_ref.startswith(f"{PostgresBlobStore.scheme}:"),
+    )
+
+    async with AsyncSessionLocal() as db:
+        while True:
+            result = await db.execute(select(File.id).where(pending).limit(batch_size))
+            file_ids = result.scalars().all()
+            if not file_ids:
+                break
+
+            for file_id in file_ids:
+                # Read the column in slices rather than loading it whole.
+                chunks = PostgresBlobStore(db).iter_chunks(str(file_id))
+                staged = await store.stage(chunks)
+                blob_ref = await store.commit(staged, file_id)
+                await db.execute(
+                    update(File)
+                    .where(File.id == file_id)
+                    .values(blob_ref=blob_ref, size=staged.size, ciphertext=None)
+                )
+                await db.commit()
+                moved += 1
+
+            print(f"📦 Moved {moved} file(s) to {store.root}")
+
+    await engine.dispose()
+    print(f"✅ Blob migration finished, {moved} file(s) moved.")
+
+
+async def gc_uploads() -> None:
+    async with AsyncSessionLocal() as db:
+        purged = await purge_expired_upload_sessions(db)
+    await engine.dispose()
+    print(f"✅ Purged {purged} expired upload session(s).")
+
+
+async def compact_indexes(email: str | None) -> None:
+    async with engine.begin() as conn:
+        await upgrade_index_entries_table(conn)
+
+    async with AsyncSessionLocal() as db:
+        query = select(User.id, User.email)
+        if email:
+            query = query.where(User.email == email)
+        users = (await db.execute(query)).all()
+
+        for user_id, user_email in users:
+            stats = await compact_index(db, user_id)
+            if stats["chains"]:
+                print(
+                    f"🗜️  {user_email}: {stats['chains']} chain(s), "
+                    f"{stats['entries_before']} → {stats['entries_after']} entries, "
+                    f"{stats['dropped']} purged value(s) dropped"
+                )
+
+    await engine.dispose()
+    print(f"✅ Index compaction finished for {len(users)} user(s).")
+
+
+async def archive_audit(before: date, force: bool) -> None:
+    async with engine.begin() as conn:
+        await ensure_audit_partitions(conn)
+        partitions = await monthly_partitions(conn)
+
+    archived = 0
+    async with AsyncSessionLocal() as db:
+        for name, month in sorted(partitions.items(), key=lambda item: item[1]):
+            if add_months(month, 1) > before:
+                continue
+            manifest = await archive_partition(db, name, month, force=force)
+            if manifest is None:
+                # Later segments would not link up with a missing one.
+                break
+            archived += 1
+            print(f"🗄️  Archived {name}: {manifest['rows']} entries")
+
+    await engine.dispose()
+    print(f"✅ Audit archival finished, {archived} partition(s) archived.")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate = commands.add_parser(
+        "migrate-blobs", help="Move file ciphertext from Postgres to local storage"
+    )
+    migrate.add_argument("--batch-size", type=int, default=100)
+
+    commands.add_parser("gc-uploads", help="Delete expired upload sessions")
+
+    compact = commands.add_parser(
+        "compact-index", help="Collapse search index chains into packed entries"
+    )
+    compact.add_argument("--email", help="Only compact this user's index")
+
+    archive = commands.add_parser(
+        "archive-audit",
+        help="Export old tamper_log partitions to segment files and drop them",
+    )
+    archive.add_argument(
+        "--before",
+        type=lambda value: datetime.strptime(value, "%Y-%m").date(),
+        help="Archive months ending on or before this month (YYYY-MM); "
+        "defaults to AUDIT_ARCHIVE_AFTER_MONTHS ago",
+    )
+    archive.add_argument(
+        "--force",
+        action="store_true",
+        help="Archive even if chain verification fails, recording the errors",
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "migrate-blobs":
+        asyncio.run(migrate_blobs(args.batch_size))
+    elif args.command == "gc-uploads":
+        asyncio.run(gc_uploads())
+    elif args.command == "compact-index":
+        asyncio.run(compact_indexes(args.email))
+    elif args.command == "archive-audit":
+        before = args.before or add_months(
+            date.today().replace(day=1), -settings.audit_archive_after_months
+        )
+        asyncio.run(archive_audit(before, args.force))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import Field
 from pydantic_settings import BaseSettings
 
@@ -27,10 +29,57 @@ class Settings(BaseSettings):
     mail_starttls: bool = Field(True, alias="MAIL_STARTTLS")
     mail_ssl_tls: bool = Field(False, alias="MAIL_SSL_TLS")
 
+    # Auth
+    password_hash_workers: int = Field(4, alias="PASSWORD_HASH_WORKERS")
+    user_cache_size: int = Field(10000, alias="USER_CACHE_SIZE")
+    user_cache_ttl_seconds: int = Field(60, alias="USER_CACHE_TTL_SECONDS")
+
+    # Files
+    file_batch_max_size: int = Field(500, alias="FILE_BATCH_MAX_SIZE")
+
+    # Search
+    search_batch_max_tokens: int = Field(50, alias="SEARCH_BATCH_MAX_TOKENS")
+    search_stream_batch_size: int = Field(500, alias="SEARCH_STREAM_BATCH_SIZE")
+    index_bulk_batch_size: int = Field(1000, alias="INDEX_BULK_BATCH_SIZE")
+    index_bulk_max_line_size: int = Field(64 * 1024, alias="INDEX_BULK_MAX_LINE_SIZE")
+    index_compact_pack_size: int = Field(1000, alias="INDEX_COMPACT_PACK_SIZE")
+
+    # Audit
+    signing_workers: int = Field(4, alias="SIGNING_WORKERS")
+    # "sync" writes each entry before the response is sent; "async" queues it
+    # for the background writer and can lose queued entries on a crash.
+    audit_write_mode: Literal["sync", "async"] = Field("sync", alias="AUDIT_WRITE_MODE")
+    # "merkle" signs one Merkle root per written batch instead of every entry;
+    # only worthwhile together with AUDIT_WRITE_MODE=async.
+    audit_signing_mode: Literal["entry", "merkle"] = Field(
+        "entry", alias="AUDIT_SIGNING_MODE"
+    )
+    audit_batch_size: int = Field(500, alias="AUDIT_BATCH_SIZE")
+    audit_flush_interval_ms: int = Field(200, alias="AUDIT_FLUSH_INTERVAL_MS")
+    audit_queue_max_size: int = Field(10000, alias="AUDIT_QUEUE_MAX_SIZE")
+    audit_verify_batch_size: int = Field(1000, alias="AUDIT_VERIFY_BATCH_SIZE")
+    audit_verify_chunk_size: int = Field(100, alias="AUDIT_VERIFY_CHUNK_SIZE")
+    audit_partition_months_ahead: int = Field(3, alias="AUDIT_PARTITION_MONTHS_AHEAD")
+    audit_archive_after_months: int = Field(12, alias="AUDIT_ARCHIVE_AFTER_MONTHS")
+    audit_archive_dir: str = Field("storage/audit_archive", alias="AUDIT_ARCHIVE_DIR")
+
     # PEM Keys
     keys_dir: str = Field(..., alias="KEYS_DIR")
     fallback_keys_dir: str = Field(..., alias="FALLBACK_KEYS_DIR")
 
+    # Storage
+    blob_backend: str = Field("local", alias="BLOB_BACKEND")
+    storage_dir: str = Field("storage", alias="STORAGE_DIR")
+    upload_chunk_size: int = Field(1024 * 1024, alias="UPLOAD_CHUNK_SIZE")
+    download_chunk_size: int = Field(256 * 1024, alias="DOWNLOAD_CHUNK_SIZE")
+    upload_part_max_size: int = Field(64 * 1024 * 1024, alias="UPLOAD_PART_MAX_SIZE")
+    upload_session_ttl_hours: int = Field(24, alias="UPLOAD_SESSION_TTL_HOURS")
+    upload_gc_interval_minutes: int = Field(15, alias="UPLOAD_GC_INTERVAL_MINUTES")
+    # 12-byte nonce + 64 KB of AES-GCM ciphertext + 16-byte tag
+    ciphertext_chunk_size: int = Field(
+        12 + 64 * 1024 + 16, alias="CIPHERTEXT_CHUNK_SIZE"
+    )
+
     @property
     def database_url(self) -> str:
         return (
@@ -0,0 +1,169 @@
+"""Archived ``tamper_log`` segments on local disk.
+
+Each archived monthly partition becomes two files in ``AUDIT_ARCHIVE_DIR``:
+
+* ``<partition>.jsonl.gz``: one entry per line, grouped by chain and ordered
+  by ``(created_at, id)`` within each chain.
+* ``<partition>.manifest.json``: the partition's range, row count, the
+  segment's SHA-256, and per chain the entry count, the last entry and its
+  hash. The manifest is signed with the server key.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+from app.config import settings
+from app.core.audit_log import sign_entry_hash, verify_signature
+from app.models import TamperLog
+
+SEGMENT_SUFFIX = ".jsonl.gz"
+MANIFEST_SUFFIX = ".manifest.json"
+
+
+def archive_dir() -> Path:
+    return Path(settings.audit_archive_dir)
+
+
+def segment_path(partition: str) -> Path:
+    return archive_dir() / f"{partition}{SEGMENT_SUFFIX}"
+
+
+def manifest_path(partition: str) -> Path:
+    return archive_dir() / f"{partition}{MANIFEST_SUFFIX}"
+
+
+def entry_to_record(key: str, entry: TamperLog) -> dict:
+    return {
+        "chain": key,
+        "id": entry.id,
+        "user_id": str(entry.user_id) if entry.user_id else None,
+        "entry_json": entry.entry_json,
+        "entry_hash": entry.entry_hash,
+        "prev_hash": entry.prev_hash,
+        "signature": (
+            base64.b64encode(entry.signature).decode() if entry.signature else None
+        ),
+        "batch_id": entry.batch_id,
+        "merkle_proof": entry.merkle_proof,
+        "created_at": entry.created_at.isoformat(),
+    }
+
+
+def record_to_entry(record: dict) -> TamperLog:
+    """Rebuild a transient ``TamperLog`` for verification."""
+    return TamperLog(
+        id=record["id"],
+        user_id=uuid.UUID(record["user_id"]) if record["user_id"] else None,
+        entry_json=record["entry_json"],
+        entry_hash=record["entry_hash"],
+        prev_hash=record["prev_hash"],
+        signature=(
+            base64.b64decode(record["signature"]) if record["signature"] else None
+        ),
+        batch_id=record["batch_id"],
+        merkle_proof=record["merkle_proof"],
+        created_at=datetime.fromisoformat(record["created_at"]),
+    )
+
+
+def summary_end(summary: dict) -> tuple[datetime, int]:
+    """``(created_at, id)`` of the last entry a chain has in a segment."""
+    return datetime.fromisoformat(summary["last_created_at"]), summary["last_id"]
+
+
+def _manifest_digest(manifest: dict) -> str:
+    unsigned = {k: v for k, v in manifest.items() if k != "signature"}
+    return hashlib.sha256(json.dumps(unsigned, sort_keys=True).encode()).hexdigest()
+
+
+def sign_manifest(manifest: dict) -> None:
+    signature = sign_entry_hash(_manifest_digest(manifest))
+    manifest["signature"] = base64.b64encode(signature).decode()
+
+
+def file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        while chunk := fh.read(settings.download_chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifests() -> List[dict]:
+    """All segment manifests, oldest partition first."""
+    root = archive_dir()
+    if not root.is_dir():
+        return []
+    manifests = [
+        json.loads(path.read_text()) for path in root.glob(f"*{MANIFEST_SUFFIX}")
+    ]
+    return sorted(manifests, key=lambda m: m["range_start"])
+
+
+# Segments whose file matched their manifest, by partition, with the
+# manifest hash and the file's mtime and size at the time it was hashed.
+_hashed_segments: dict[str, tuple[str, int, int]] = {}
+
+
+def check_segment(manifest: dict, rehash: bool = False) -> Optional[str]:
+    """Return why a segment can't be trusted, or None if it checks out.
+
+    Hashing a segment reads the whole file, so a match is remembered until
+    the file's mtime or size changes; ``rehash`` hashes it regardless.
+    """
+    try:
+        verify_signature(
+            base64.b64decode(manifest["signature"]), _manifest_digest(manifest)
+        )
+    except Exception as e:
+        return f"manifest signature is invalid ({e!r})"
+
+    path = segment_path(manifest["partition"])
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return "segment file is missing"
+
+    fingerprint = (manifest["sha256"], stat.st_mtime_ns, stat.st_size)
+    if rehash or _hashed_segments.get(manifest["partition"]) != fingerprint:
+        _hashed_segments.pop(manifest["partition"], None)
+        if file_sha256(path) != manifest["sha256"]:
+            return "segment file does not match its manifest"
+        _hashed_segments[manifest["partition"]] = fingerprint
+    return None
+
+
+def read_segment_chain(
+    manifest: dict, key: str, after: Optional[tuple[datetime, int]] = None
+) -> Iterator[List[TamperLog]]:
+    """Entries of one chain in a segment, optionally only those past ``after``.
+
+    Yields them in slices of ``AUDIT_VERIFY_BATCH_SIZE`` so a long chain is
+    never held in memory at once.
+    """
+    entries: List[TamperLog] = []
+    in_chain = False
+    with gzip.open(segment_path(manifest["partition"]), "rt") as fh:
+        for line in fh:
+            record = json.loads(line)
+            if record["chain"] != key:
+                # Chains are contiguous, so the first other key after ours ends it.
+                if in_chain:
+                    break
+                continue
+            in_chain = True
+            entry = record_to_entry(record)
+            if after and (entry.created_at, entry.id) <= after:
+                continue
+            entries.append(entry)
+            if len(entries) >= settings.audit_verify_batch_size:
+                yield entries
+                entries = []
+    if entries:
+        yield entries
@@ -3,7 +3,9 @@ from functools import wraps
 from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.audit_log import record_audit_log
+from app.config import settings
+from app.core.audit_log import build_audit_entry, record_audit_log
+from app.core.audit_writer import audit_writer
 from app.db import get_db
 
 
@@ -19,12 +21,17 @@ def audit_event(action: str):
             user_id = getattr(user, "id", None)
 
             try:
-                await record_audit_log(
-                    db=db,
-                    request=request,
-                    user_id=user_id,
-                    action=action,
-                )
+                if settings.audit_write_mode == "async":
+                    await audit_writer.enqueue(
+                        user_id, build_audit_entry(request, action)
+                    )
+                else:
+                    await record_audit_log(
+                        db=db,
+                        request=request,
+                        user_id=user_id,
+                        action=action,
+                    )
             except Exception as e:
                 print(f"[AUDIT ERROR] Failed to record log: {e}")
             return response
@@ -1,24 +1,50 @@
+import asyncio
 import hashlib
 import json
 from datetime import datetime
 from typing import Optional
 
 from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
 from fastapi import Request
-from sqlalchemy import select
+from sqlalchemy import literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.server_keys import SERVER_PRIVATE_KEY
-from app.models import TamperLog
+from app.config import settings
+from app.core.merkle import build_merkle_tree
+from app.core.server_keys import SERVER_PRIVATE_KEY, SERVER_PUBLIC_KEY
+from app.core.workers import signing_pool
+from app.models import AuditBatch, AuditChainHead, TamperLog
 
 
-async def record_audit_log(
-    db: AsyncSession,
-    request: Request,
-    user_id: Optional[str],
-    action: str,
-):
+def sign_entry_hash(entry_hash: str) -> bytes:
+    return SERVER_PRIVATE_KEY.sign(
+        entry_hash.encode(),
+        padding.PSS(
+            mgf=padding.MGF1(hashes.SHA256()),
+            salt_length=padding.PSS.MAX_LENGTH,
+        ),
+        hashes.SHA256(),
+    )
+
+
+def verify_signature(signature: bytes, signed_hash: str) -> None:
+    if not isinstance(SERVER_PUBLIC_KEY, rsa.RSAPublicKey):
+        raise RuntimeError("Server public key is not RSA")
+
+    SERVER_PUBLIC_KEY.verify(
+        signature,
+        signed_hash.encode(),
+        padding.PSS(
+            mgf=padding.MGF1(hashes.SHA256()),
+            salt_length=padding.PSS.MAX_LENGTH,
+        ),
+        hashes.SHA256(),
+    )
+
+
+def build_audit_entry(request: Request, action: str) -> dict:
     client_ip = request.headers.get("X-Forwarded-For")
     if client_ip:
         client_ip = client_ip.split(",")[0].strip()
@@ -27,7 +53,7 @@ async def record_audit_log(
 
     user_agent = request.headers.get("User-Agent", "unknown")
 
-    entry_json = {
+    return {
         "action": action,
         "timestamp": datetime.now().isoformat(),
         "ip": client_ip,
@@ -36,37 +62,116 @@ async def record_audit_log(
         "method": request.method,
     }
 
+
+def chain_key(user_id) -> str:
+    return str(user_id) if user_id else "anonymous"
+
+
+async def _select_heads_for_update(db: AsyncSession, keys) -> dict:
     result = await db.execute(
-        select(TamperLog.entry_hash)
-        .where(TamperLog.user_id == user_id)
-        .order_by(TamperLog.created_at.desc())
-        .limit(1)
+        select(AuditChainHead.chain_key, AuditChainHead.entry_hash)
+        .where(AuditChainHead.chain_key.in_(keys))
+        .order_by(AuditChainHead.chain_key)
+        .with_for_update()
     )
-    prev_hash = result.scalar_one_or_none()
+    return dict(result.all())
 
-    payload = json.dumps(entry_json, sort_keys=True).encode()
-    if prev_hash:
-        payload += prev_hash.encode()
-    entry_hash = hashlib.sha256(payload).hexdigest()
 
-    signature = SERVER_PRIVATE_KEY.sign(
-        entry_hash.encode(),
-        padding.PSS(
-            mgf=padding.MGF1(hashes.SHA256()),
-            salt_length=padding.PSS.MAX_LENGTH,
-        ),
-        hashes.SHA256(),
-    )
+async def _lock_chain_heads(db: AsyncSession, user_ids: set) -> dict:
+    """Lock the chain head of every given user and return their hashes.
 
-    entry = TamperLog(
-        user_id=user_id,
-        entry_json=entry_json,
-        entry_hash=entry_hash,
-        prev_hash=prev_hash,
-        signature=signature,
-    )
-    db.add(entry)
+    Existing head rows are locked first, in key order so concurrent batches
+    can't deadlock; the locks are held until the caller commits. Only a chain
+    without a head row yet (written before heads were tracked) gets one,
+    backfilled from its newest ``tamper_log`` entry.
+    """
+    keys = {chain_key(user_id): user_id for user_id in user_ids}
+    heads = await _select_heads_for_update(db, keys)
+
+    missing = sorted(keys.keys() - heads.keys())
+    for key in missing:
+        newest = (
+            select(TamperLog.entry_hash)
+            .where(TamperLog.user_id == keys[key])
+            .order_by(TamperLog.created_at.desc(), TamperLog.id.desc())
+            .limit(1)
+            .scalar_subquery()
+        )
+        await db.execute(
+            pg_insert(AuditChainHead)
+            .from_select(["chain_key", "entry_hash"], select(literal(key), newest))
+            .on_conflict_do_nothing(index_elements=[AuditChainHead.chain_key])
+        )
+    if missing:
+        heads.update(await _select_heads_for_update(db, missing))
+
+    return {keys[key]: entry_hash for key, entry_hash in heads.items()}
+
+
+async def append_audit_entries(
+    db: AsyncSession, entries: list[tuple[Optional[str], dict]]
+) -> list[TamperLog]:
+    """Chain, sign and insert entries in one transaction.
+
+    ``entries`` is a list of ``(user_id, entry_json)`` pairs in the order they
+    happened; each user's entries are linked onto their chain in that order.
+    """
+    heads = await _lock_chain_heads(db, {user_id for user_id, _ in entries})
+    rows: list[TamperLog] = []
+    for user_id, entry_json in entries:
+        prev_hash = heads[user_id]
+
+        payload = json.dumps(entry_json, sort_keys=True).encode()
+        if prev_hash:
+            payload += prev_hash.encode()
+        entry_hash = hashlib.sha256(payload).hexdigest()
+        heads[user_id] = entry_hash
+
+        rows.append(
+            TamperLog(
+                user_id=user_id,
+                entry_json=entry_json,
+                entry_hash=entry_hash,
+                prev_hash=prev_hash,
+            )
+        )
+
+    if settings.audit_signing_mode == "merkle":
+        root, proofs = build_merkle_tree([str(row.entry_hash) for row in rows])
+        batch = AuditBatch(
+            merkle_root=root,
+            leaf_count=len(rows),
+            signature=await signing_pool.run(sign_entry_hash, root),
+        )
+        db.add(batch)
+        await db.flush()
+        for row, proof in zip(rows, proofs):
+            row.batch_id = batch.id
+            row.merkle_proof = proof
+    else:
+        signatures = await asyncio.gather(
+            *(signing_pool.run(sign_entry_hash, row.entry_hash) for row in rows)
+        )
+        for row, signature in zip(rows, signatures):
+            row.signature = signature
+
+    db.add_all(rows)
+    for user_id, entry_hash in heads.items():
+        await db.execute(
+            update(AuditChainHead)
+            .where(AuditChainHead.chain_key == chain_key(user_id))
+            .values(entry_hash=entry_hash, updated_at=datetime.now())
+        )
     await db.commit()
-    await db.refresh(entry)
+    return rows
+
 
+async def record_audit_log(
+    db: AsyncSession,
+    request: Request,
+    user_id: Optional[str],
+    action: str,
+):
+    entry_json = build_audit_entry(request, action)
+    (entry,) = await append_audit_entries(db, [(user_id, entry_json)])
     return entry
@@ -0,0 +1,277 @@
+"""Monthly partitions of ``tamper_log`` and their archival.
+
+``tamper_log`` is range-partitioned on ``created_at``. The app keeps one
+partition per month, created ``AUDIT_PARTITION_MONTHS_AHEAD`` in advance, plus
+a default partition that catches anything outside them. Old monthly
+partitions are exported to segment files (see ``app/core/audit_archive.py``),
+then detached and dropped.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.config import settings
+from app.core.audit_archive import (
+    archive_dir,
+    entry_to_record,
+    file_sha256,
+    load_manifests,
+    manifest_path,
+    segment_path,
+    sign_manifest,
+)
+from app.core.audit_log import chain_key
+from app.core.audit_verify import ChainVerifier
+from app.db import engine
+from app.models import TamperLog
+
+PARENT = TamperLog.__tablename__
+DEFAULT_PARTITION = f"{PARENT}_default"
+_MONTHLY = re.compile(rf"^{PARENT}_p(\d{{4}})(\d{{2}})$")
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_p{month:%Y%m}"
+
+
+def _bound(month: date) -> str:
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+async def is_partitioned(conn: AsyncConnection | AsyncSession) -> bool:
+    result = await conn.execute(
+        text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": PARENT},
+    )
+    return result.scalar_one_or_none() == "p"
+
+
+async def monthly_partitions(conn: AsyncConnection | AsyncSession) -> dict:
+    """Existing monthly partitions as ``{name: first day of the month}``."""
+    result = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = to_regclass(:name)"
+        ),
+        {"name": PARENT},
+    )
+    partitions = {}
+    for name in result.scalars():
+        match = _MONTHLY.match(name)
+        if match:
+            partitions[name] = date(int(match[1]), int(match[2]), 1)
+    return partitions
+
+
+async def upgrade_tamper_log_table(conn: AsyncConnection) -> None:
+    """Add the Merkle batch columns to a ``tamper_log`` created before them.
+
+    Like ``upgrade_files_table``, every statement is a no-op once applied; on
+    a partitioned table they propagate to the partitions.
+    """
+    await conn.execute(
+        text(
+            f"ALTER TABLE {PARENT} "
+            "ADD COLUMN IF NOT EXISTS batch_id INTEGER REFERENCES audit_batches(id), "
+            "ADD COLUMN IF NOT EXISTS merkle_proof JSON, "
+            "ALTER COLUMN signature DROP NOT NULL"
+        )
+    )
+
+
+async def ensure_audit_partitions(
+    conn: AsyncConnection, today: Optional[date] = None
+) -> list[str]:
+    """Create the default partition and monthly ones up to N months ahead."""
+    if not await is_partitioned(conn):
+        print(
+            f"⚠️  {PARENT} is not partitioned; recreate it to enable "
+            "partitioning and archival."
+        )
+        return []
+
+    await conn.execute(
+        text(
+            f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} "
+            f"PARTITION OF {PARENT} DEFAULT"
+        )
+    )
+
+    existing = await monthly_partitions(conn)
+    this_month = (today or date.today()).replace(day=1)
+    created = []
+    for n in range(settings.audit_partition_months_ahead + 1):
+        month = add_months(this_month, n)
+        name = partition_name(month)
+        if name in existing:
+            continue
+        try:
+            # Fails if the default partition already holds rows for this month.
+            async with conn.begin_nested():
+                await conn.execute(
+                    text(
+                        f"CREATE TABLE {name} PARTITION OF {PARENT} "
+                        f"FOR VALUES FROM ('{_bound(month)}') "
+                        f"TO ('{_bound(add_months(month, 1))}')"
+                    )
+                )
+            created.append(name)
+        except Exception as e:
+            print(f"[AUDIT PARTITION ERROR] Could not create {name}: {e}")
+    return created
+
+
+async def run_audit_partition_maintenance() -> None:
+    while True:
+        await asyncio.sleep(24 * 60 * 60)
+        try:
+            async with engine.begin() as conn:
+                created = await ensure_audit_partitions(conn)
+            if created:
+                print(f"🗂️  Created audit partition(s): {', '.join(created)}")
+        except Exception as e:
+            print(f"[AUDIT PARTITION ERROR] {e}")
+
+
+async def archive_partition(
+    db: AsyncSession, name: str, month: date, force: bool = False
+) -> Optional[dict]:
+    """Export one monthly partition to a segment, then detach and drop it.
+
+    Every chain in the partition is verified while it is exported, continuing
+    from where earlier segments left off. A partition with verification
+    errors is left in place unless ``force`` is set, in which case the errors
+    are recorded in the manifest. Returns the manifest (just the row count for
+    an empty partition, which is dropped without files), or None if the
+    partition was kept.
+    """
+    start, end = month, add_months(month, 1)
+    start_at = datetime.combine(start, datetime.min.time(), timezone.utc)
+    end_at = datetime.combine(end, datetime.min.time(), timezone.utc)
+
+    # Where each chain stood at the end of the segments already archived.
+    heads = {}
+    for manifest in load_manifests():
+        for key, summary in manifest["chains"].items():
+            heads[key] = summary
+
+    root = archive_dir()
+    root.mkdir(parents=True, exist_ok=True)
+    final_path = segment_path(name)
+    tmp_path = final_path.with_name(f"{final_path.name}.tmp")
+
+    chains: dict = {}
+    errors: list[str] = []
+    rows = 0
+    verifier: Optional[ChainVerifier] = None
+    current_key = None
+
+    def finish_chain() -> None:
+        if verifier is not None:
+            errors.extend(f"[{current_key}] {error}" for error in verifier.errors)
+
+    result = await db.stream_scalars(
+        select(TamperLog)
+        .where(TamperLog.created_at >= start_at, TamperLog.created_at < end_at)
+        .order_by(TamperLog.user_id, TamperLog.created_at, TamperLog.id)
+        .execution_options(yield_per=settings.audit_verify_batch_size)
+    )
+    with gzip.open(tmp_path, "wt") as fh:
+        async for entries in result.partitions():
+            # Slice the batch into runs of one chain for the verifier.
+            runs: list[tuple[str, list]] = []
+            for entry in entries:
+                key = chain_key(entry.user_id)
+                if not runs or runs[-1][0] != key:
+                    runs.append((key, []))
+                runs[-1][1].append(entry)
+
+            for key, run in runs:
+                if key != current_key:
+                    finish_chain()
+                    previous = heads.get(key)
+                    verifier = ChainVerifier(
+                        db,
+                        prev_hash=previous["last_hash"] if previous else None,
+                        count=previous["count"] if previous else 0,
+                    )
+                    current_key = key
+                    chains[key] = {"count": 0}
+                await verifier.check(run)
+
+                for entry in run:
+                    fh.write(json.dumps(entry_to_record(key, entry)) + "\n")
+                last = run[-1]
+                chains[key].update(
+                    count=chains[key]["count"] + len(run),
+                    last_id=last.id,
+                    last_created_at=last.created_at.isoformat(),
+                    last_hash=last.entry_hash,
+                )
+                rows += len(run)
+        finish_chain()
+
+    if errors and not force:
+        await db.rollback()
+        os.remove(tmp_path)
+        print(f"❌ {name}: chain verification failed, partition kept.")
+        for error in errors[:20]:
+            print(f"   {error}")
+        return None
+
+    # End the export's read transaction before taking the table locks.
+    await db.commit()
+
+    manifest: dict = {"partition": name, "rows": 0}
+    if not rows:
+        os.remove(tmp_path)
+    else:
+        with open(tmp_path, "rb") as fh:
+            os.fsync(fh.fileno())
+        os.replace(tmp_path, final_path)
+        manifest = {
+            "partition": name,
+            "range_start": start_at.isoformat(),
+            "range_end": end_at.isoformat(),
+            "rows": rows,
+            "sha256": file_sha256(final_path),
+            "chains": chains,
+            "verified": not errors,
+            "errors": errors[:100],
+            "archived_at": datetime.now(timezone.utc).isoformat(),
+        }
+        sign_manifest(manifest)
+
+    # The manifest is what makes a segment visible to verification, so it is
+    # written inside the transaction that drops the partition: the entries
+    # are always either live or archived, never both.
+    try:
+        await db.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        await db.execute(text(f"DROP TABLE {name}"))
+        if rows:
+            tmp_manifest = manifest_path(name).with_suffix(".tmp")
+            with open(tmp_manifest, "w") as fh:
+                json.dump(manifest, fh, indent=2)
+                fh.flush()
+                os.fsync(fh.fileno())
+            os.replace(tmp_manifest, manifest_path(name))
+        await db.commit()
+    except BaseException:
+        await db.rollback()
+        manifest_path(name).unlink(missing_ok=True)
+        raise
+    return manifest
@@ -1,70 +1,275 @@
+import asyncio
 import hashlib
 import json
+from datetime import datetime, timezone
 from typing import List, Optional, Tuple
 
-from cryptography.hazmat.primitives import hashes
-from cryptography.hazmat.primitives.asymmetric import padding, rsa
-from sqlalchemy import select
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
-from app.core.server_keys import SERVER_PUBLIC_KEY
-from app.models import TamperLog
+from app.config import settings
+from app.core.audit_archive import (
+    check_segment,
+    load_manifests,
+    read_segment_chain,
+    summary_end,
+)
+from app.core.audit_log import chain_key, sign_entry_hash, verify_signature
+from app.core.merkle import merkle_root_from_proof
+from app.core.workers import signing_pool
+from app.models import AuditBatch, AuditCheckpoint, TamperLog
 
 
-async def verify_audit_chain(db: AsyncSession, user_id) -> Tuple[bool, List[str]]:
-    result = await db.execute(
-        select(TamperLog)
-        .where(TamperLog.user_id == user_id)
-        .order_by(TamperLog.created_at.asc())
+def _check_signatures(items: List[Tuple[bytes, str]]) -> List[Optional[str]]:
+    """Verify ``(signature, signed_hash)`` pairs; runs on the signing pool."""
+    failures: List[Optional[str]] = []
+    for signature, signed_hash in items:
+        try:
+            verify_signature(signature, signed_hash)
+            failures.append(None)
+        except Exception as e:
+            failures.append(str(e))
+    return failures
+
+
+async def _check_signatures_in_chunks(
+    items: List[Tuple[bytes, str]],
+) -> List[Optional[str]]:
+    size = settings.audit_verify_chunk_size
+    chunks = [items[i : i + size] for i in range(0, len(items), size)]
+    results = await asyncio.gather(
+        *(signing_pool.run(_check_signatures, chunk) for chunk in chunks)
     )
-    entries = result.scalars().all()
+    return [failure for result in results for failure in result]
 
-    if not entries:
-        return True, []
 
-    errors: List[str] = []
-    prev_hash: Optional[str] = None
+def _checkpoint_digest(
+    key: str, last_entry_id: int, last_created_at: datetime, entry_hash: str, count: int
+) -> str:
+    message = "|".join(
+        [
+            key,
+            str(last_entry_id),
+            last_created_at.astimezone(timezone.utc).isoformat(),
+            entry_hash,
+            str(count),
+        ]
+    )
+    return hashlib.sha256(message.encode()).hexdigest()
+
 
-    for i, entry in enumerate(entries):
-        entry_data = entry.entry_json
-        entry_hash_val = str(entry.entry_hash)
-        prev_hash_val = (
-            str(entry.prev_hash) if getattr(entry, "prev_hash", None) else None
+async def _load_checkpoint(
+    db: AsyncSession, key: str, errors: List[str]
+) -> Optional[AuditCheckpoint]:
+    checkpoint = await db.get(AuditCheckpoint, key)
+    if checkpoint is None:
+        return None
+
+    digest = _checkpoint_digest(
+        key,
+        int(checkpoint.last_entry_id),
+        checkpoint.last_created_at,
+        str(checkpoint.entry_hash),
+        int(checkpoint.entry_count),
+    )
+    try:
+        verify_signature(checkpoint.signature, digest)  # type: ignore
+    except Exception as e:
+        errors.append(
+            f"Checkpoint signature verification failed, re-verifying from the "
+            f"first entry: {e}"
         )
-        sig_raw = getattr(entry, "signature", None)
+        return None
+    return checkpoint
 
-        payload = json.dumps(entry_data, sort_keys=True).encode()
-        if prev_hash:
-            payload += prev_hash.encode()
-        computed_hash = hashlib.sha256(payload).hexdigest()
 
-        if computed_hash != entry_hash_val:
-            errors.append(
-                f"Hash mismatch at entry {entry.id}: expected {computed_hash}, got {entry_hash_val}"
+async def _save_checkpoint(
+    db: AsyncSession, key: str, last: TamperLog, count: int
+) -> None:
+    digest = _checkpoint_digest(
+        key, int(last.id), last.created_at, str(last.entry_hash), count
+    )
+    values = dict(
+        last_entry_id=last.id,
+        last_created_at=last.created_at,
+        entry_hash=last.entry_hash,
+        entry_count=count,
+        signature=await signing_pool.run(sign_entry_hash, digest),
+        created_at=datetime.now(),
+    )
+    await db.execute(
+        pg_insert(AuditCheckpoint)
+        .values(chain_key=key, **values)
+        .on_conflict_do_update(index_elements=[AuditCheckpoint.chain_key], set_=values)
+    )
+    await db.commit()
+
+
+class ChainVerifier:
+    """Checks one audit chain slice by slice, in chain order.
+
+    ``prev_hash`` and ``count`` describe what precedes the first slice (a
+    checkpoint or an earlier archive segment); errors accumulate in
+    ``errors`` and ``last`` is the newest entry seen.
+    """
+
+    def __init__(self, db: AsyncSession, prev_hash: Optional[str] = None, count=0):
+        self.db = db
+        self.prev_hash = prev_hash
+        self.count = count
+        self.errors: List[str] = []
+        self.last: Optional[TamperLog] = None
+        # Merkle batches seen so far: their root, and the signature failure if any.
+        self.batch_roots: dict = {}
+        self.batch_errors: dict = {}
+
+    async def check(self, entries: List[TamperLog]) -> None:
+        # Signatures are independent of each other, so they are checked on the
+        # signing pool while the hash links are walked here in order.
+        new_batches = []
+        batch_ids = {
+            entry.batch_id
+            for entry in entries
+            if entry.batch_id is not None and entry.batch_id not in self.batch_roots
+        }
+        if batch_ids:
+            batch_result = await self.db.execute(
+                select(AuditBatch).where(AuditBatch.id.in_(batch_ids))
             )
+            new_batches = batch_result.scalars().all()
+            for batch in new_batches:
+                self.batch_roots[batch.id] = str(batch.merkle_root)
 
-        try:
-            if not isinstance(SERVER_PUBLIC_KEY, rsa.RSAPublicKey):
-                raise RuntimeError("Server public key is not RSA")
-
-            SERVER_PUBLIC_KEY.verify(
-                sig_raw,  # type: ignore
-                entry_hash_val.encode(),
-                padding.PSS(
-                    mgf=padding.MGF1(hashes.SHA256()),
-                    salt_length=padding.PSS.MAX_LENGTH,
-                ),
-                hashes.SHA256(),
+        signed = [entry for entry in entries if entry.batch_id is None]
+        signature_check = asyncio.ensure_future(
+            _check_signatures_in_chunks(
+                [(entry.signature, str(entry.entry_hash)) for entry in signed]
+                + [(batch.signature, str(batch.merkle_root)) for batch in new_batches]
             )
-        except Exception as e:
-            errors.append(f"Signature verification failed at entry {entry.id}: {e}")
+        )
 
-        if i > 0 and prev_hash_val != prev_hash:
+        # Per entry: hash error, the entry's signature problem if any, and
+        # chain error, in the order errors have always been reported.
+        walked = []
+        for entry in entries:
+            entry_data = entry.entry_json
+            entry_hash_val = str(entry.entry_hash)
+            prev_hash_val = (
+                str(entry.prev_hash) if getattr(entry, "prev_hash", None) else None
+            )
+
+            payload = json.dumps(entry_data, sort_keys=True).encode()
+            if self.prev_hash:
+                payload += self.prev_hash.encode()
+            computed_hash = hashlib.sha256(payload).hexdigest()
+
+            hash_error = None
+            if computed_hash != entry_hash_val:
+                hash_error = f"Hash mismatch at entry {entry.id}: expected {computed_hash}, got {entry_hash_val}"
+
+            proof_error = None
+            if entry.batch_id is not None:
+                root = self.batch_roots.get(entry.batch_id)
+                proof = entry.merkle_proof or []
+                if root is None:
+                    proof_error = f"audit batch {entry.batch_id} is missing"
+                elif merkle_root_from_proof(entry_hash_val, proof) != root:
+                    proof_error = "Merkle proof does not match the batch root"
+
+            # The first entry of a fresh chain has nothing to link to; after a
+            # checkpoint it must link to the checkpointed hash.
+            chain_error = None
+            if self.count > 0 and prev_hash_val != self.prev_hash:
+                chain_error = (
+                    f"Broken chain at entry {entry.id}: prev_hash mismatch "
+                    f"(expected {self.prev_hash}, got {prev_hash_val})"
+                )
+
+            walked.append((entry, hash_error, proof_error, chain_error))
+            self.prev_hash = entry_hash_val
+            self.last = entry
+            self.count += 1
+
+        failures = await signature_check
+        signature_errors = failures[: len(signed)]
+        for batch, failure in zip(new_batches, failures[len(signed) :]):
+            self.batch_errors[batch.id] = (
+                f"batch {batch.id}: {failure!r}" if failure is not None else None
+            )
+
+        signed_index = 0
+        for entry, hash_error, proof_error, chain_error in walked:
+            if hash_error:
+                self.errors.append(hash_error)
+
+            if entry.batch_id is None:
+                signature_error = signature_errors[signed_index]
+                signed_index += 1
+            else:
+                signature_error = proof_error or self.batch_errors.get(entry.batch_id)
+            if signature_error is not None:
+                self.errors.append(
+                    f"Signature verification failed at entry {entry.id}: {signature_error}"
+                )
+
+            if chain_error:
+                self.errors.append(chain_error)
+
+
+async def verify_audit_chain(
+    db: AsyncSession, user_id, full: bool = False
+) -> Tuple[bool, List[str]]:
+    """Verify a user's audit chain, resuming from its last checkpoint.
+
+    Archived segments holding the chain are checked first, then live entries
+    are streamed in batches of ``AUDIT_VERIFY_BATCH_SIZE``. When the whole
+    run is clean, a signed checkpoint at the last entry is stored so the next
+    call only checks newer entries; ``full`` ignores it and re-hashes the
+    archived segment files.
+    """
+    key = chain_key(user_id)
+    errors: List[str] = []
+    checkpoint = None if full else await _load_checkpoint(db, key, errors)
+
+    query = (
+        select(TamperLog)
+        .where(TamperLog.user_id == user_id)
+        .order_by(TamperLog.created_at.asc(), TamperLog.id.asc())
+    )
+    verifier = ChainVerifier(db)
+    verifier.errors = errors
+    after = None
+    if checkpoint is not None:
+        after = (checkpoint.last_created_at, int(checkpoint.last_entry_id))
+        query = query.where(tuple_(TamperLog.created_at, TamperLog.id) > tuple_(*after))
+        verifier.prev_hash = str(checkpoint.entry_hash)
+        verifier.count = int(checkpoint.entry_count)
+
+    for manifest in await run_in_threadpool(load_manifests):
+        summary = manifest["chains"].get(key)
+        if summary is None or (after and summary_end(summary) <= after):
+            continue
+        problem = await run_in_threadpool(check_segment, manifest, full)
+        if problem:
             errors.append(
-                f"Broken chain at entry {entry.id}: prev_hash mismatch "
-                f"(expected {prev_hash}, got {prev_hash_val})"
+                f"Archived segment {manifest['partition']} failed its integrity "
+                f"check: {problem}"
             )
+            continue
+        async for entries in iterate_in_threadpool(
+            read_segment_chain(manifest, key, after)
+        ):
+            await verifier.check(entries)
+
+    result = await db.stream_scalars(
+        query.execution_options(yield_per=settings.audit_verify_batch_size)
+    )
+    async for entries in result.partitions():
+        await verifier.check(entries)
 
-        prev_hash = entry_hash_val
+    if verifier.last is not None and not errors:
+        await _save_checkpoint(db, key, verifier.last, verifier.count)
 
     return len(errors) == 0, errors
@@ -0,0 +1,109 @@
+import asyncio
+from typing import Optional
+
+from app.config import settings
+from app.core.audit_log import append_audit_entries, chain_key
+from app.db import AsyncSessionLocal
+
+
+class AuditWriter:
+    """Background writer for ``AUDIT_WRITE_MODE=async``.
+
+    Requests only enqueue the captured entry; a single task drains the queue
+    in batches of up to ``AUDIT_BATCH_SIZE`` every ``AUDIT_FLUSH_INTERVAL_MS``
+    and writes each batch in one transaction. Having one consumer keeps every
+    user's chain in enqueue order. Entries still queued when the process
+    dies are lost, which is the trade-off against sync mode.
+
+    A batch that fails to write is retried once per chain, so a transient
+    error or one bad chain doesn't lose the other users' entries; only
+    entries whose retry fails too are dropped and counted in ``dropped``.
+    """
+
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def start(self) -> None:
+        self.queue = asyncio.Queue(maxsize=settings.audit_queue_max_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def enqueue(self, user_id, entry_json: dict) -> None:
+        assert self.queue is not None, "Audit writer is not running"
+        await self.queue.put((user_id, entry_json))
+
+    async def _next_batch(self) -> list:
+        assert self.queue is not None
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.audit_flush_interval_ms / 1000
+        while len(batch) < settings.audit_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _write(self, entries: list) -> None:
+        async with AsyncSessionLocal() as db:
+            await append_audit_entries(db, entries)
+
+    async def _flush(self, batch: list) -> None:
+        try:
+            try:
+                await self._write(batch)
+                return
+            except Exception as e:
+                print(
+                    f"[AUDIT ERROR] Failed to write {len(batch)} log(s), "
+                    f"retrying per chain: {e}"
+                )
+
+            chains: dict[str, list] = {}
+            for user_id, entry_json in batch:
+                chains.setdefault(chain_key(user_id), []).append((user_id, entry_json))
+            await asyncio.sleep(settings.audit_flush_interval_ms / 1000)
+            for key, entries in chains.items():
+                try:
+                    await self._write(entries)
+                except Exception as e:
+                    self.dropped += len(entries)
+                    print(
+                        f"[AUDIT ERROR] Dropped {len(entries)} log(s) "
+                        f"of chain {key}: {e}"
+                    )
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            await self._flush(batch)
+
+    async def stop(self) -> None:
+        """Flush everything still queued, then stop the writer task."""
+        if self._task is None or self.queue is None:
+            return
+        await self.queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        print("🧾 Audit writer drained.")
+
+    def stats(self) -> dict:
+        return {
+            "mode": settings.audit_write_mode,
+            "queued": self.queue.qsize() if self.queue else 0,
+            "dropped": self.dropped,
+        }
+
+
+audit_writer = AuditWriter()
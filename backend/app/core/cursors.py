@@ -0,0 +1,22 @@
+import base64
+from datetime import datetime
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException
+
+T = TypeVar("T")
+
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    """Opaque keyset cursor for listings ordered by ``(created_at, id)``."""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str, id_type: Callable[[str], T]) -> tuple[datetime, T]:
+    """Parse a cursor from ``encode_cursor``; ``id_type`` converts the id."""
+    try:
+        created_at, _, row_id = base64.urlsafe_b64decode(cursor).decode().partition("|")
+        return datetime.fromisoformat(created_at), id_type(row_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
@@ -1,14 +1,74 @@
+import time
+from collections import OrderedDict
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy import select
+from sqlalchemy import inspect, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
 
+from app.config import settings
 from app.core.security import decode_token
 from app.db import get_db
 from app.models import User
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# The encrypted index state can be large and must never be served stale, so
+# it is read straight from the database by the routes that need it.
+_UNCACHED_COLUMNS = {"index_state_ciphertext", "index_state_iv"}
+_CACHED_COLUMNS = [
+    attr for attr in inspect(User).column_attrs if attr.key not in _UNCACHED_COLUMNS
+]
+
+
+class UserCache:
+    """Bounded LRU of authenticated users with a per-entry TTL.
+
+    Entries hold plain column snapshots rather than ORM instances, and every
+    hit builds a fresh transient ``User`` so requests never share state.
+    The cache is per process: call ``invalidate`` wherever a user's
+    ``is_active`` flag or keys change, and rely on the TTL to bound
+    staleness across workers.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: str) -> User | None:
+        entry = self._entries.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return User(**entry[1])
+
+        if entry:
+            del self._entries[user_id]
+        self.misses += 1
+        return None
+
+    def put(self, user: User) -> None:
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+        snapshot = {attr.key: getattr(user, attr.key) for attr in _CACHED_COLUMNS}
+        self._entries[str(user.id)] = (time.monotonic() + self.ttl_seconds, snapshot)
+        self._entries.move_to_end(str(user.id))
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id) -> None:
+        self._entries.pop(str(user_id), None)
+
+    def stats(self) -> dict:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+user_cache = UserCache(settings.user_cache_size, settings.user_cache_ttl_seconds)
+
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
@@ -23,11 +83,18 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token"
         )
 
-    result = await db.execute(select(User).where(User.id == user_id))
+    cached = user_cache.get(str(user_id))
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        select(User).options(load_only(*_CACHED_COLUMNS)).where(User.id == user_id)
+    )
     user = result.scalar_one_or_none()
     if not user or not bool(user.is_active):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found or inactive",
         )
+    user_cache.put(user)
     return user
@@ -0,0 +1,57 @@
+from typing import Iterable, Optional
+
+from sqlalchemy import LargeBinary, any_, literal, select
+from sqlalchemy.dialects.postgresql import ARRAY, array
+
+from app.models import IndexEntry
+
+
+def index_chain(owner_id, tokens: Iterable[bytes], max_depth: Optional[int] = None):
+    """Recursive CTE walking ``IndexEntry.prev_token`` chains from ``tokens``.
+
+    Yields one row per hop with ``root`` (the starting token the hop belongs
+    to), ``token``, ``value``, ``prev_token``, ``file_id`` and ``depth`` (1
+    for the starting entry). All chains are resolved in the same query.
+    ``path`` carries the tokens already visited so a cycle in a chain
+    terminates the walk instead of looping. ``max_depth`` stops each walk
+    after that many hops. The starting tokens go in as one array parameter,
+    so any number of them stays under the driver's bind parameter limit.
+    """
+    chain = (
+        select(
+            IndexEntry.token.label("root"),
+            IndexEntry.token,
+            IndexEntry.value,
+            IndexEntry.prev_token,
+            IndexEntry.file_id,
+            literal(1).label("depth"),
+            array([IndexEntry.token]).label("path"),
+        )
+        .where(
+            IndexEntry.owner_id == owner_id,
+            IndexEntry.token == any_(literal(list(tokens), ARRAY(LargeBinary))),
+        )
+        .cte("chain", recursive=True)
+    )
+
+    step = (
+        select(
+            chain.c.root,
+            IndexEntry.token,
+            IndexEntry.value,
+            IndexEntry.prev_token,
+            IndexEntry.file_id,
+            chain.c.depth + 1,
+            chain.c.path.op("||")(IndexEntry.token),
+        )
+        .join(chain, IndexEntry.token == chain.c.prev_token)
+        .where(
+            IndexEntry.owner_id == owner_id,
+            ~(IndexEntry.token == any_(chain.c.path)),
+        )
+    )
+
+    if max_depth is not None:
+        step = step.where(chain.c.depth < max_depth)
+
+    return chain.union_all(step)
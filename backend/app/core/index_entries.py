@@ -0,0 +1,242 @@
+import base64
+import json
+import os
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import any_, delete, func, insert, literal, select, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.config import settings
+from app.core.index_chain import index_chain
+from app.models import File, IndexEntry
+
+
+async def upgrade_index_entries_table(conn: AsyncConnection) -> None:
+    """Add ``file_id`` and the chain-walk index to an existing table.
+
+    Like ``upgrade_files_table``, every statement is a no-op once applied.
+    """
+    await conn.execute(
+        text("ALTER TABLE index_entries ADD COLUMN IF NOT EXISTS file_id UUID")
+    )
+    await conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_index_entries_owner_prev "
+            "ON index_entries (owner_id, prev_token)"
+        )
+    )
+
+
+def index_rows(tokens: list, owner_id, file_id=None) -> list[dict]:
+    """Validate client index tokens and turn them into ``IndexEntry`` rows.
+
+    ``file_id`` ties every row to that file; otherwise a token may name its
+    file itself with an optional ``file_id`` key.
+    """
+    rows = []
+    try:
+        for t in tokens:
+            value_obj = t.get("value")
+            if (
+                not isinstance(value_obj, dict)
+                or "ciphertext_b64" not in value_obj
+                or "iv_b64" not in value_obj
+            ):
+                raise HTTPException(
+                    status_code=400, detail="Invalid token value format"
+                )
+            rows.append(
+                {
+                    "token": base64.b64decode(t["token"]),
+                    "owner_id": owner_id,
+                    "value": json.dumps(value_obj).encode(),  # ciphertext+iv
+                    "prev_token": (
+                        base64.b64decode(t["prev_token"])
+                        if t.get("prev_token")
+                        else None
+                    ),
+                    "file_id": file_id
+                    or (uuid.UUID(t["file_id"]) if t.get("file_id") else None),
+                }
+            )
+    except HTTPException:
+        raise
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid token format")
+    return rows
+
+
+async def lock_owner_index(db: AsyncSession, owner_id, shared: bool = False) -> None:
+    """Take a transaction-level advisory lock on an owner's index.
+
+    Compaction holds it exclusively while it rewrites chains; upserts share
+    it, so they wait for a running compaction instead of being overwritten
+    by it.
+    """
+    lock = func.pg_advisory_xact_lock_shared if shared else func.pg_advisory_xact_lock
+    await db.execute(select(lock(func.hashtext(f"index:{owner_id}"))))
+
+
+async def upsert_index_rows(db: AsyncSession, rows: list[dict]) -> int:
+    """Insert or overwrite index entries keyed by ``(token, owner_id)``."""
+    # A single INSERT ... ON CONFLICT cannot touch the same key twice.
+    unique = list({(r["token"], r["owner_id"]): r for r in rows}.values())
+    if not unique:
+        return 0
+
+    for owner_id in sorted({str(r["owner_id"]) for r in unique}):
+        await lock_owner_index(db, owner_id, shared=True)
+
+    stmt = pg_insert(IndexEntry)
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[IndexEntry.token, IndexEntry.owner_id],
+            set_={
+                "value": stmt.excluded.value,
+                "prev_token": stmt.excluded.prev_token,
+                "file_id": stmt.excluded.file_id,
+            },
+        ),
+        unique,
+    )
+    return len(unique)
+
+
+def expand_values(value: bytes) -> list[str]:
+    """Search values stored in one entry, unpacking compacted entries."""
+    if not value.startswith(b"["):
+        return [value.decode()]
+    return [
+        json.dumps({k: v for k, v in item.items() if k != "file_id"})
+        for item in json.loads(value)
+    ]
+
+
+def _entry_items(value: bytes, file_id) -> list[dict]:
+    data = json.loads(value)
+    if isinstance(data, list):
+        return data
+    if file_id is not None:
+        data["file_id"] = str(file_id)
+    return [data]
+
+
+async def compact_index(db: AsyncSession, owner_id) -> dict:
+    """Collapse an owner's keyword chains into packed multi-value entries.
+
+    Every chain is rewritten newest-first into entries holding up to
+    ``INDEX_COMPACT_PACK_SIZE`` values each. The head keeps its token, so
+    the client's stored index state still finds it, and new uploads keep
+    chaining onto it as before. Values pointing at files that no longer
+    exist are dropped. Packed entries expand back into individual values
+    on search, so the ``/search`` response shape is unchanged.
+    """
+    await lock_owner_index(db, owner_id)
+
+    referenced = select(IndexEntry.prev_token).where(
+        IndexEntry.owner_id == owner_id, IndexEntry.prev_token.is_not(None)
+    )
+    result = await db.execute(
+        select(IndexEntry.token).where(
+            IndexEntry.owner_id == owner_id, IndexEntry.token.not_in(referenced)
+        )
+    )
+    heads = result.scalars().all()
+
+    stats = {"chains": 0, "entries_before": 0, "entries_after": 0, "dropped": 0}
+    if not heads:
+        await db.commit()
+        return stats
+    pack_size = settings.index_compact_pack_size
+
+    chain = index_chain(owner_id, heads)
+    result = await db.execute(
+        select(chain.c.root, chain.c.token, chain.c.value, chain.c.file_id).order_by(
+            chain.c.root, chain.c.depth
+        )
+    )
+    chains: dict[bytes, list] = {}
+    for row in result.all():
+        chains.setdefault(row.root, []).append(row)
+
+    items_by_root = {
+        root: [item for hop in hops for item in _entry_items(hop.value, hop.file_id)]
+        for root, hops in chains.items()
+    }
+    file_ids = {
+        item["file_id"]
+        for items in items_by_root.values()
+        for item in items
+        if item.get("file_id")
+    }
+    live: set[str] = set()
+    if file_ids:
+        # One array parameter: a vault can reference more files than the
+        # driver allows bind parameters.
+        ids = literal([uuid.UUID(f) for f in file_ids], ARRAY(PG_UUID(as_uuid=True)))
+        result = await db.execute(select(File.id).where(File.id == any_(ids)))
+        live = {str(f) for f in result.scalars().all()}
+
+    stale: set[bytes] = set()
+    new_rows: list[dict] = []
+
+    for root, hops in chains.items():
+        items = items_by_root[root]
+        kept, seen = [], set()
+        for item in items:
+            key = (item.get("ciphertext_b64"), item.get("iv_b64"))
+            if item.get("file_id") and item["file_id"] not in live:
+                continue
+            if key not in seen:
+                seen.add(key)
+                kept.append(item)
+
+        dropped = len(items) - len(kept)
+        if not dropped and len(hops) <= -(-len(kept) // pack_size):
+            continue  # already as short as packing can make it
+
+        stats["chains"] += 1
+        stats["entries_before"] += len(hops)
+        stats["dropped"] += dropped
+        stale.update(hop.token for hop in hops)
+
+        groups = [kept[i : i + pack_size] for i in range(0, len(kept), pack_size)]
+        tokens = [root] + [os.urandom(16) for _ in groups[1:]]
+        for i, group in enumerate(groups):
+            row = {
+                "token": tokens[i],
+                "owner_id": owner_id,
+                "prev_token": tokens[i + 1] if i + 1 < len(tokens) else None,
+                "file_id": None,
+            }
+            if len(group) == 1:
+                item = dict(group[0])
+                file_id = item.pop("file_id", None)
+                row["value"] = json.dumps(item).encode()
+                row["file_id"] = uuid.UUID(file_id) if file_id else None
+            else:
+                row["value"] = json.dumps(group).encode()
+            new_rows.append(row)
+
+    stats["entries_after"] = len(new_rows)
+    if not stale:
+        await db.commit()
+        return stats
+
+    stale_tokens = list(stale)
+    for i in range(0, len(stale_tokens), 10000):
+        await db.execute(
+            delete(IndexEntry).where(
+                IndexEntry.owner_id == owner_id,
+                IndexEntry.token.in_(stale_tokens[i : i + 10000]),
+            )
+        )
+    if new_rows:
+        await db.execute(insert(IndexEntry), new_rows)
+    await db.commit()
+
+    return stats
@@ -0,0 +1,53 @@
+"""Merkle trees over audit entry hashes.
+
+Leaves and inner nodes are hashed with distinct prefixes so a leaf can never
+be passed off as an inner node. An odd node at the end of a level is carried
+up unchanged. A proof is the list of sibling hashes from leaf to root, each
+tagged with the side ("L" or "R") the sibling sits on.
+"""
+
+import hashlib
+from typing import List, Tuple
+
+Proof = List[Tuple[str, str]]
+
+
+def _leaf(entry_hash: str) -> str:
+    return hashlib.sha256(b"\x00" + entry_hash.encode()).hexdigest()
+
+
+def _node(left: str, right: str) -> str:
+    return hashlib.sha256(b"\x01" + left.encode() + right.encode()).hexdigest()
+
+
+def build_merkle_tree(entry_hashes: List[str]) -> Tuple[str, List[Proof]]:
+    """Return the root and one inclusion proof per entry hash."""
+    if not entry_hashes:
+        raise ValueError("Cannot build a Merkle tree without leaves")
+
+    level = [_leaf(h) for h in entry_hashes]
+    # positions[i] is the index of leaf i's ancestor on the current level
+    positions = list(range(len(level)))
+    proofs: List[Proof] = [[] for _ in entry_hashes]
+
+    while len(level) > 1:
+        for leaf, pos in enumerate(positions):
+            sibling = pos ^ 1
+            if sibling < len(level):
+                side = "L" if sibling < pos else "R"
+                proofs[leaf].append((side, level[sibling]))
+
+        level = [
+            _node(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+        positions = [pos // 2 for pos in positions]
+
+    return level[0], proofs
+
+
+def merkle_root_from_proof(entry_hash: str, proof: Proof) -> str:
+    node = _leaf(entry_hash)
+    for side, sibling in proof:
+        node = _node(sibling, node) if side == "L" else _node(node, sibling)
+    return node
@@ -4,16 +4,17 @@ import jwt
 from passlib.context import CryptContext
 
 from app.config import settings
+from app.core.workers import password_pool
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    return await password_pool.run(pwd_context.hash, password)
 
 
-def verify_password(password: str, hashed: str) -> bool:
-    return pwd_context.verify(password, hashed)
+async def verify_password(password: str, hashed: str) -> bool:
+    return await password_pool.run(pwd_context.verify, password, hashed)
 
 
 def create_access_token(data: dict) -> str:
@@ -0,0 +1,353 @@
+import hashlib
+import os
+import shutil
+import uuid
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from fastapi import UploadFile
+from sqlalchemy import func, select, text, update
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.models import File
+
+
+@dataclass
+class StagedBlob:
+    size: int
+    digest: str
+    tmp_path: Optional[Path] = None
+    data: Optional[bytes] = None
+
+
+async def iter_upload(upload: UploadFile) -> AsyncIterator[bytes]:
+    while chunk := await upload.read(settings.upload_chunk_size):
+        yield chunk
+
+
+async def upgrade_files_table(conn: AsyncConnection) -> None:
+    """Bring a ``files`` table created before blob storage up to date.
+
+    ``create_all`` never alters existing tables, so the blob columns are added
+    here, ``ciphertext`` becomes optional and the listing's keyset index is
+    created. Every statement is a no-op once applied.
+    """
+    await conn.execute(
+        text(
+            "ALTER TABLE files "
+            "ADD COLUMN IF NOT EXISTS blob_ref VARCHAR, "
+            "ADD COLUMN IF NOT EXISTS size BIGINT, "
+            "ALTER COLUMN ciphertext DROP NOT NULL"
+        )
+    )
+    await conn.execute(
+        text(
+            "CREATE INDEX IF NOT EXISTS idx_files_owner_deleted_created "
+            "ON files (owner_id, deleted, created_at)"
+        )
+    )
+
+
+def _remove(path: Path) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class BlobStore(ABC):
+    """Where file ciphertext lives.
+
+    Writes happen in two steps: ``stage`` consumes the incoming chunks and
+    ``commit`` publishes them under a blob reference of the form
+    ``"<scheme>:<key>"``, which is what gets stored on ``File.blob_ref``.
+
+    A store whose ``commit`` writes through the DB session sets
+    ``commits_with_row`` and is published inside the file row's transaction.
+    Other stores are published only after that transaction commits, so a
+    failed commit never leaves an unreferenced blob behind.
+    """
+
+    scheme: str
+    commits_with_row = False
+
+    def ref(self, key: str) -> str:
+        return f"{self.scheme}:{key}"
+
+    @abstractmethod
+    def ref_for(self, staged: StagedBlob, file_id: uuid.UUID) -> str:
+        """The reference ``commit`` will publish ``staged`` under."""
+
+    @abstractmethod
+    async def stage(self, chunks: AsyncIterator[bytes]) -> StagedBlob: ...
+
+    @abstractmethod
+    async def commit(self, staged: StagedBlob, file_id: uuid.UUID) -> str: ...
+
+    @abstractmethod
+    async def discard(self, staged: StagedBlob) -> None: ...
+
+    @abstractmethod
+    async def read(self, key: str) -> bytes: ...
+
+    @abstractmethod
+    async def size(self, key: str) -> int: ...
+
+    @abstractmethod
+    def iter_chunks(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        """Yield bytes ``[start, end)`` in chunks of ``DOWNLOAD_CHUNK_SIZE``."""
+
+
+class LocalBlobStore(BlobStore):
+    """Content-addressed store on local disk.
+
+    Blobs are named by their SHA-256 and sharded two levels deep
+    (``objects/ab/cd/abcd...``). Staging writes to ``tmp/`` and commit is an
+    atomic rename into the object directory.
+    """
+
+    scheme = "local"
+
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root or settings.storage_dir)
+        self.objects_dir = self.root / "objects"
+        self.tmp_dir = self.root / "tmp"
+
+    def path_for(self, key: str) -> Path:
+        return self.objects_dir / key[:2] / key[2:4] / key
+
+    async def stage(self, chunks: AsyncIterator[bytes]) -> StagedBlob:
+        await run_in_threadpool(self.tmp_dir.mkdir, parents=True, exist_ok=True)
+        tmp_path = self.tmp_dir / f"{uuid.uuid4().hex}.part"
+
+        digest = hashlib.sha256()
+        size = 0
+        fh = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                digest.update(chunk)
+                await run_in_threadpool(fh.write, chunk)
+                size += len(chunk)
+            await run_in_threadpool(fh.flush)
+            await run_in_threadpool(os.fsync, fh.fileno())
+        except BaseException:
+            await run_in_threadpool(fh.close)
+            await run_in_threadpool(_remove, tmp_path)
+            raise
+        await run_in_threadpool(fh.close)
+
+        return StagedBlob(size=size, digest=digest.hexdigest(), tmp_path=tmp_path)
+
+    def ref_for(self, staged: StagedBlob, file_id: uuid.UUID) -> str:
+        return self.ref(staged.digest)
+
+    async def commit(self, staged: StagedBlob, file_id: uuid.UUID) -> str:
+        assert staged.tmp_path is not None
+        final_path = self.path_for(staged.digest)
+        await run_in_threadpool(final_path.parent.mkdir, parents=True, exist_ok=True)
+        # Identical ciphertext already stored: keep the existing object.
+        if final_path.exists():
+            await run_in_threadpool(_remove, staged.tmp_path)
+        else:
+            await run_in_threadpool(os.replace, staged.tmp_path, final_path)
+        return self.ref_for(staged, file_id)
+
+    async def discard(self, staged: StagedBlob) -> None:
+        if staged.tmp_path is not None:
+            await run_in_threadpool(_remove, staged.tmp_path)
+
+    async def read(self, key: str) -> bytes:
+        return await run_in_threadpool(self.path_for(key).read_bytes)
+
+    async def size(self, key: str) -> int:
+        stat = await run_in_threadpool(os.stat, self.path_for(key))
+        return stat.st_size
+
+    async def iter_chunks(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        if end is None:
+            end = await self.size(key)
+        fh = await run_in_threadpool(open, self.path_for(key), "rb")
+        try:
+            await run_in_threadpool(fh.seek, start)
+            remaining = end - start
+            while remaining > 0:
+                chunk = await run_in_threadpool(
+                    fh.read, min(settings.download_chunk_size, remaining)
+                )
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_in_threadpool(fh.close)
+
+
+class PostgresBlobStore(BlobStore):
+    """Legacy backend keeping ciphertext in the ``files.ciphertext`` column."""
+
+    scheme = "pg"
+    commits_with_row = True
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def stage(self, chunks: AsyncIterator[bytes]) -> StagedBlob:
+        digest = hashlib.sha256()
+        parts = []
+        async for chunk in chunks:
+            digest.update(chunk)
+            parts.append(chunk)
+        data = b"".join(parts)
+        return StagedBlob(size=len(data), digest=digest.hexdigest(), data=data)
+
+    def ref_for(self, staged: StagedBlob, file_id: uuid.UUID) -> str:
+        return self.ref(str(file_id))
+
+    async def commit(self, staged: StagedBlob, file_id: uuid.UUID) -> str:
+        await self.db.execute(
+            update(File).where(File.id == file_id).values(ciphertext=staged.data)
+        )
+        return self.ref_for(staged, file_id)
+
+    async def discard(self, staged: StagedBlob) -> None:
+        staged.data = None
+
+    async def read(self, key: str) -> bytes:
+        result = await self.db.execute(
+            select(File.ciphertext).where(File.id == uuid.UUID(key))
+        )
+        return result.scalar_one_or_none() or b""
+
+    async def size(self, key: str) -> int:
+        result = await self.db.execute(
+            select(func.length(File.ciphertext)).where(File.id == uuid.UUID(key))
+        )
+        return result.scalar_one_or_none() or 0
+
+    async def iter_chunks(
+        self, key: str, start: int = 0, end: Optional[int] = None
+    ) -> AsyncIterator[bytes]:
+        # substring() lets Postgres slice the value instead of shipping the
+        # whole column for every chunk.
+        if end is None:
+            end = await self.size(key)
+        offset = start
+        while offset < end:
+            length = min(settings.download_chunk_size, end - offset)
+            result = await self.db.execute(
+                select(func.substring(File.ciphertext, offset + 1, length)).where(
+                    File.id == uuid.UUID(key)
+                )
+            )
+            chunk = result.scalar_one_or_none()
+            if not chunk:
+                break
+            offset += len(chunk)
+            yield chunk
+
+
+class PartTooLarge(Exception):
+    pass
+
+
+class UploadPartStore:
+    """Parts of in-progress upload sessions, kept on local disk.
+
+    Each part lives at ``uploads/<session>/<n>.part`` regardless of the blob
+    backend; completing a session streams the parts in order into the blob
+    store.
+    """
+
+    def __init__(self, root: str | Path | None = None):
+        self.root = Path(root or settings.storage_dir) / "uploads"
+
+    def session_dir(self, session_id: uuid.UUID) -> Path:
+        return self.root / str(session_id)
+
+    def path_for(self, session_id: uuid.UUID, part_number: int) -> Path:
+        return self.session_dir(session_id) / f"{part_number}.part"
+
+    async def write(
+        self,
+        session_id: uuid.UUID,
+        part_number: int,
+        chunks: AsyncIterator[bytes],
+        max_size: int,
+    ) -> tuple[int, str]:
+        final_path = self.path_for(session_id, part_number)
+        await run_in_threadpool(final_path.parent.mkdir, parents=True, exist_ok=True)
+        tmp_path = final_path.with_name(f"{final_path.name}.{uuid.uuid4().hex}")
+
+        digest = hashlib.sha256()
+        size = 0
+        fh = await run_in_threadpool(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > max_size:
+                    raise PartTooLarge()
+                digest.update(chunk)
+                await run_in_threadpool(fh.write, chunk)
+            await run_in_threadpool(fh.flush)
+            await run_in_threadpool(os.fsync, fh.fileno())
+        except BaseException:
+            await run_in_threadpool(fh.close)
+            await run_in_threadpool(_remove, tmp_path)
+            raise
+        await run_in_threadpool(fh.close)
+
+        # Re-sending a part replaces the previous attempt atomically.
+        await run_in_threadpool(os.replace, tmp_path, final_path)
+        return size, digest.hexdigest()
+
+    async def iter_parts(
+        self, session_id: uuid.UUID, part_numbers: list[int]
+    ) -> AsyncIterator[bytes]:
+        for part_number in part_numbers:
+            fh = await run_in_threadpool(
+                open, self.path_for(session_id, part_number), "rb"
+            )
+            try:
+                while chunk := await run_in_threadpool(
+                    fh.read, settings.upload_chunk_size
+                ):
+                    yield chunk
+            finally:
+                await run_in_threadpool(fh.close)
+
+    async def delete(self, session_id: uuid.UUID) -> None:
+        await run_in_threadpool(
+            shutil.rmtree, self.session_dir(session_id), ignore_errors=True
+        )
+
+
+upload_parts = UploadPartStore()
+
+
+def get_blob_store(db: AsyncSession, scheme: str | None = None) -> BlobStore:
+    scheme = scheme or settings.blob_backend
+    if scheme == LocalBlobStore.scheme:
+        return LocalBlobStore()
+    if scheme == PostgresBlobStore.scheme:
+        return PostgresBlobStore(db)
+    raise ValueError(f"Unknown blob backend: {scheme}")
+
+
+def resolve_blob(db: AsyncSession, f: File) -> tuple[BlobStore, str]:
+    """Return the store and key holding a file's ciphertext.
+
+    Rows written before blob references existed have no ``blob_ref`` and
+    live in the legacy column.
+    """
+    if not f.blob_ref:
+        return PostgresBlobStore(db), str(f.id)
+    scheme, _, key = str(f.blob_ref).partition(":")
+    return get_blob_store(db, scheme), key
@@ -0,0 +1,42 @@
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.storage import upload_parts
+from app.db import AsyncSessionLocal
+from app.models import UploadSession
+
+
+async def purge_expired_upload_sessions(db: AsyncSession) -> int:
+    """Delete abandoned upload sessions and their stored parts."""
+    # Sessions locked by a running complete are left for the next pass.
+    result = await db.execute(
+        select(UploadSession.id)
+        .where(UploadSession.expires_at < datetime.now())
+        .with_for_update(skip_locked=True)
+    )
+    session_ids = result.scalars().all()
+    if not session_ids:
+        return 0
+
+    await db.execute(delete(UploadSession).where(UploadSession.id.in_(session_ids)))
+    await db.commit()
+
+    for session_id in session_ids:
+        await upload_parts.delete(session_id)
+    return len(session_ids)
+
+
+async def run_upload_gc() -> None:
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                purged = await purge_expired_upload_sessions(db)
+            if purged:
+                print(f"🧹 Purged {purged} expired upload session(s).")
+        except Exception as e:
+            print(f"[UPLOAD GC ERROR] {e}")
+        await asyncio.sleep(settings.upload_gc_interval_minutes * 60)
@@ -0,0 +1,65 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+
+class WorkerPool:
+    """Bounded thread pool for CPU-heavy calls made from async handlers.
+
+    The work handed to these pools (bcrypt, RSA) runs in C extensions that
+    release the GIL, so threads give real parallelism without blocking the
+    event loop. ``max_workers`` caps concurrency; anything beyond it waits in
+    the executor queue and shows up as ``queued`` in ``stats``.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.in_flight = 0
+        self._executor: ThreadPoolExecutor | None = None
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=f"vaultx-{self.name}"
+            )
+        loop = asyncio.get_running_loop()
+        self.in_flight += 1
+        try:
+            return await loop.run_in_executor(
+                self._executor, functools.partial(fn, *args, **kwargs)
+            )
+        finally:
+            self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.max_workers),
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_pool = WorkerPool("password", settings.password_hash_workers)
+signing_pool = WorkerPool("signing", settings.signing_workers)
+
+POOLS = [password_pool, signing_pool]
+
+
+def pool_stats() -> dict:
+    return {pool.name: pool.stats() for pool in POOLS}
+
+
+def shutdown_pools() -> None:
+    for pool in POOLS:
+        pool.shutdown()
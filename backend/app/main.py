@@ -1,23 +1,51 @@
-from contextlib import asynccontextmanager
+import asyncio
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
 
 from app.config import settings
+from app.core.audit_partitions import (
+    ensure_audit_partitions,
+    run_audit_partition_maintenance,
+    upgrade_tamper_log_table,
+)
+from app.core.audit_writer import audit_writer
+from app.core.deps import user_cache
+from app.core.index_entries import upgrade_index_entries_table
+from app.core.storage import upgrade_files_table
+from app.core.upload_sessions import run_upload_gc
+from app.core.workers import pool_stats, shutdown_pools
 from app.db import AsyncSessionLocal, Base, engine
-from app.routes import audit, auth, files, search, shares, user
+from app.routes import audit, auth, files, index, search, shares, user
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await upgrade_files_table(conn)
+        await upgrade_index_entries_table(conn)
+        await upgrade_tamper_log_table(conn)
+        await ensure_audit_partitions(conn)
         print("🗄️  Database tables checked/created.")
     print("✅ Database connected successfully.")
 
+    upload_gc = asyncio.create_task(run_upload_gc())
+    audit_partitions = asyncio.create_task(run_audit_partition_maintenance())
+    if settings.audit_write_mode == "async":
+        audit_writer.start()
+
     yield
 
+    for task in (upload_gc, audit_partitions):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+
+    await audit_writer.stop()
+    shutdown_pools()
     await engine.dispose()
     print("🧹 Database connection closed.")
 
@@ -34,11 +62,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "Accept-Ranges",
+        "Content-Length",
+        "Content-Range",
+        "X-File-IV",
+        "X-Encrypted-Kf",
+        "X-Encrypted-Kf-IV",
+        "X-Wrapped-Key",
+    ],
 )
 
 app.include_router(auth.router)
 app.include_router(files.router)
 app.include_router(search.router)
+app.include_router(index.router)
 app.include_router(shares.router)
 app.include_router(user.router)
 app.include_router(audit.router)
@@ -58,4 +96,7 @@ async def health():
         "status": "ok",
         "database": db_status,
         "environment": settings.app_env,
+        "user_cache": user_cache.stats(),
+        "workers": pool_stats(),
+        "audit_writer": audit_writer.stats(),
     }
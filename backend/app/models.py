@@ -4,6 +4,7 @@ from datetime import datetime
 
 from sqlalchemy import (
     JSON,
+    BigInteger,
     Boolean,
     Column,
     DateTime,
@@ -15,7 +16,7 @@ from sqlalchemy import (
     Text,
 )
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 
 from app.db import Base
 
@@ -94,7 +95,10 @@ class File(Base):
         nullable=False,
         index=True,
     )
-    ciphertext = Column(LargeBinary, nullable=False)
+    # Legacy blob storage (see PostgresBlobStore); never loaded with the row.
+    ciphertext = deferred(Column(LargeBinary, nullable=True))
+    blob_ref = Column(String, nullable=True)
+    size = Column(BigInteger, nullable=True)
     file_iv = Column(LargeBinary, nullable=False)
     metadata_ciphertext = Column(LargeBinary, nullable=False)
     metadata_iv = Column(LargeBinary, nullable=False)
@@ -106,6 +110,51 @@ class File(Base):
     shares = relationship(
         "FileShare", back_populates="file", cascade="all, delete-orphan"
     )
+    __table_args__ = (
+        Index("idx_files_owner_deleted_created", "owner_id", "deleted", "created_at"),
+    )
+
+
+UPLOAD_FIELDS = (
+    "metadata_ciphertext",
+    "metadata_iv",
+    "encrypted_kf",
+    "encrypted_kf_iv",
+    "file_iv",
+)
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+    id = Column(PG_UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    owner_id = Column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    file_id = Column(PG_UUID(as_uuid=True), nullable=False, unique=True)
+    metadata_ciphertext = Column(LargeBinary, nullable=False)
+    metadata_iv = Column(LargeBinary, nullable=False)
+    encrypted_kf = Column(LargeBinary, nullable=True)
+    encrypted_kf_iv = Column(LargeBinary, nullable=True)
+    file_iv = Column(LargeBinary, nullable=False)
+    tokens = Column(JSON, nullable=False, default=list)
+    created_at = Column(DateTime(timezone=True), default=datetime.now, nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class UploadPart(Base):
+    __tablename__ = "upload_parts"
+    session_id = Column(
+        PG_UUID(as_uuid=True),
+        ForeignKey("upload_sessions.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    part_number = Column(Integer, primary_key=True)
+    size = Column(BigInteger, nullable=False)
+    sha256 = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=datetime.now, nullable=False)
 
 
 class FileShare(Base):
@@ -145,15 +194,72 @@ class IndexEntry(Base):
         ForeignKey("users.id", ondelete="CASCADE"),
         primary_key=True,
     )
+    # A JSON value object, or a JSON list of them once compacted.
     value = Column(LargeBinary, nullable=False)
     prev_token = Column(LargeBinary, nullable=True)
+    # File the value points at, when known. Not a foreign key: compaction
+    # uses it to drop entries of files that no longer exist.
+    file_id = Column(PG_UUID(as_uuid=True), nullable=True)
     created_at = Column(DateTime(timezone=True), default=datetime.now, nullable=False)
     __table_args__ = (
         Index("idx_index_entries_owner_created", "owner_id", "created_at"),
+        Index("idx_index_entries_owner_prev", "owner_id", "prev_token"),
     )
 
 
+class AuditBatch(Base):
+    """One RSA signature over the Merkle root of a batch of audit entries."""
+
+    __tablename__ = "audit_batches"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    merkle_root = Column(String, nullable=False)
+    leaf_count = Column(Integer, nullable=False)
+    signature = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=datetime.now, nullable=False)
+
+
+class AuditChainHead(Base):
+    """Latest entry hash of each audit chain.
+
+    ``chain_key`` is the user id, or ``"anonymous"`` for entries without a
+    user. Appends lock this row, so concurrent writers to one chain are
+    serialized and the head lookup doesn't scan ``tamper_log``.
+    """
+
+    __tablename__ = "audit_chain_heads"
+
+    chain_key = Column(String, primary_key=True)
+    entry_hash = Column(String, nullable=True)
+    updated_at = Column(DateTime(timezone=True), default=datetime.now, nullable=False)
+
+
+class AuditCheckpoint(Base):
+    """Signed marker of how far a chain has been verified.
+
+    Verification resumes after ``(last_created_at, last_entry_id)`` with
+    ``entry_hash`` as the expected ``prev_hash`` of the next entry.
+    """
+
+    __tablename__ = "audit_checkpoints"
+
+    chain_key = Column(String, primary_key=True)
+    last_entry_id = Column(Integer, nullable=False)
+    last_created_at = Column(DateTime(timezone=True), nullable=False)
+    entry_hash = Column(String, nullable=False)
+    entry_count = Column(BigInteger, nullable=False)
+    signature = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), default=datetime.now, nullable=False)
+
+
 class TamperLog(Base):
+    """Audit entries, range-partitioned by month on ``created_at``.
+
+    Partitions are created ahead of time and archived by
+    ``app/core/audit_partitions.py``; Postgres requires the partition key in
+    the primary key, hence ``(id, created_at)``.
+    """
+
     __tablename__ = "tamper_log"
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -166,7 +272,19 @@ class TamperLog(Base):
     entry_json = Column(JSON, nullable=False)
     entry_hash = Column(String, nullable=False, index=True)
     prev_hash = Column(String, nullable=True, index=True)
-    signature = Column(LargeBinary, nullable=False)
-    created_at = Column(DateTime(timezone=True), default=datetime.now, nullable=False)
+    # Entries are signed either one by one (signature) or as part of a
+    # Merkle batch (batch_id + merkle_proof, see app/core/merkle.py).
+    signature = Column(LargeBinary, nullable=True)
+    batch_id = Column(Integer, ForeignKey("audit_batches.id"), nullable=True)
+    merkle_proof = Column(JSON, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        default=datetime.now,
+        nullable=False,
+    )
 
-    __table_args__ = (Index("idx_tamper_user_created", "user_id", "created_at"),)
+    __table_args__ = (
+        Index("idx_tamper_user_created", "user_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.audit_verify import verify_audit_chain
+from app.core.cursors import decode_cursor, encode_cursor
 from app.core.deps import get_current_user
 from app.db import get_db
 from app.models import TamperLog
@@ -16,18 +19,36 @@ async def get_user_audit_logs(
     current_user=Depends(get_current_user),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
+    since: datetime | None = Query(None),
+    until: datetime | None = Query(None),
+    action: str | None = Query(None),
 ):
+    query = select(TamperLog).where(TamperLog.user_id == current_user.id)
+    if since is not None:
+        query = query.where(TamperLog.created_at >= since)
+    if until is not None:
+        query = query.where(TamperLog.created_at < until)
+    if action is not None:
+        query = query.where(TamperLog.entry_json["action"].as_string() == action)
+
+    # Keyset paging on (created_at, id) stays constant-cost on long histories
+    # and doesn't shift when new entries arrive; offset is kept for old clients.
+    if cursor:
+        created_at, log_id = decode_cursor(cursor, int)
+        query = query.where(
+            tuple_(TamperLog.created_at, TamperLog.id) < tuple_(created_at, log_id)
+        )
+    else:
+        query = query.offset(offset)
+
     result = await db.execute(
-        select(TamperLog)
-        .where(TamperLog.user_id == current_user.id)
-        .order_by(TamperLog.created_at.desc())
-        .limit(limit)
-        .offset(offset)
+        query.order_by(TamperLog.created_at.desc(), TamperLog.id.desc()).limit(limit)
     )
 
     logs = result.scalars().all()
     if not logs:
-        return {"count": 0, "logs": []}
+        return {"count": 0, "logs": [], "next_cursor": None}
 
     output = []
     for log in logs:
@@ -41,13 +62,18 @@ async def get_user_audit_logs(
             }
         )
 
-    return {"count": len(output), "logs": output}
+    next_cursor = None
+    if len(logs) == limit:
+        next_cursor = encode_cursor(logs[-1].created_at, logs[-1].id)
+
+    return {"count": len(output), "logs": output, "next_cursor": next_cursor}
 
 
 @router.get("/verify")
 async def verify_my_audit_chain(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
+    full: bool = Query(False),
 ):
-    ok, errors = await verify_audit_chain(db, current_user.id)
+    ok, errors = await verify_audit_chain(db, current_user.id, full=full)
     return {"valid": ok, "errors": errors}
@@ -34,7 +34,7 @@ async def register_user(payload: RegisterPayload, db: AsyncSession = Depends(get
 
     user = User(
         email=payload.email,
-        password_hash=hash_password(payload.password),
+        password_hash=await hash_password(payload.password),
         password_salt_b64=payload.password_salt_b64.encode(),
         enc_master_key_b64=payload.enc_master_key_b64.encode(),
         enc_master_key_iv=payload.enc_master_key_iv.encode(),
@@ -78,7 +78,7 @@ async def login_user(
 ):
     user_result = await db.execute(select(User).where(User.email == user_in.email))
     user = user_result.scalar_one_or_none()
-    if not user or not verify_password(user_in.password, str(user.password_hash)):
+    if not user or not await verify_password(user_in.password, str(user.password_hash)):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
         )
@@ -1,18 +1,60 @@
 import base64
 import json
 import uuid
+from datetime import datetime, timedelta
 
 from fastapi import APIRouter, Depends
 from fastapi import File as FastAPIFile
-from fastapi import Form, HTTPException, Query, Request, UploadFile
-from sqlalchemy import func, select
+from fastapi import Form, HTTPException, Path, Query, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import (
+    LargeBinary,
+    delete,
+    false,
+    func,
+    insert,
+    null,
+    select,
+    true,
+    tuple_,
+    union_all,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.core.audit_decorator import audit_event
+from app.core.cursors import decode_cursor, encode_cursor
 from app.core.deps import get_current_user
+from app.core.index_entries import index_rows
+from app.core.storage import (
+    BlobStore,
+    PartTooLarge,
+    PostgresBlobStore,
+    StagedBlob,
+    get_blob_store,
+    iter_upload,
+    resolve_blob,
+    upload_parts,
+)
 from app.db import get_db
-from app.models import File, FileShare, IndexEntry, User
-from app.schemas import FileBatchList, FileUploadResponse
+from app.models import (
+    UPLOAD_FIELDS,
+    File,
+    FileShare,
+    IndexEntry,
+    UploadPart,
+    UploadSession,
+    User,
+)
+from app.schemas import (
+    FileBatchList,
+    FileUploadResponse,
+    UploadPartRead,
+    UploadSessionCreate,
+    UploadSessionRead,
+)
 
 router = APIRouter(prefix="/files", tags=["files"])
 
@@ -44,66 +86,322 @@ async def upload_file(
     if existing:
         raise HTTPException(status_code=409, detail="File ID already exists")
 
+    fields = _decode_upload_fields(
+        metadata_ciphertext, metadata_iv, encrypted_kf_b64, encrypted_kf_iv, file_iv
+    )
+    _, rows = _parse_tokens_json(tokens_json, current_user.id, file_uuid)
+
+    store = get_blob_store(db)
+    staged = await store.stage(iter_upload(file))
+    new_file = await _store_file(
+        db, current_user, file_uuid, fields, rows, store, staged
+    )
+
+    return FileUploadResponse(
+        id=getattr(new_file, "id"),
+        created_at=getattr(new_file, "created_at"),
+    )
+
+
+def _decode_upload_fields(
+    metadata_ciphertext: str,
+    metadata_iv: str,
+    encrypted_kf_b64: str,
+    encrypted_kf_iv: str,
+    file_iv: str,
+) -> dict:
     try:
-        data = await file.read()
-        encrypted_kf = base64.b64decode(encrypted_kf_b64)
-        metadata_bytes = base64.b64decode(metadata_ciphertext)
-        metadata_iv_b = base64.b64decode(metadata_iv)
-        encrypted_kf_iv_b = base64.b64decode(encrypted_kf_iv)
-        file_iv_b = base64.b64decode(file_iv)
+        return {
+            "metadata_ciphertext": base64.b64decode(metadata_ciphertext),
+            "metadata_iv": base64.b64decode(metadata_iv),
+            "encrypted_kf": base64.b64decode(encrypted_kf_b64),
+            "encrypted_kf_iv": base64.b64decode(encrypted_kf_iv),
+            "file_iv": base64.b64decode(file_iv),
+        }
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid base64 payload")
 
-    new_file = File(
-        id=file_uuid,
-        owner_id=current_user.id,
-        ciphertext=data,
-        metadata_ciphertext=metadata_bytes,
-        metadata_iv=metadata_iv_b,
-        encrypted_kf=encrypted_kf,
-        encrypted_kf_iv=encrypted_kf_iv_b,
-        file_iv=file_iv_b,
-    )
-    db.add(new_file)
-    await db.flush()
 
+def _parse_tokens_json(
+    tokens_json: str, owner_id, file_id: uuid.UUID
+) -> tuple[list, list[dict]]:
+    """Parse and validate ``tokens_json``; returns the tokens and their rows."""
     try:
         tokens = json.loads(tokens_json)
     except Exception:
         raise HTTPException(status_code=400, detail="Invalid tokens JSON")
+    if not isinstance(tokens, list):
+        raise HTTPException(status_code=400, detail="Invalid tokens JSON")
+    return tokens, index_rows(tokens, owner_id, file_id)
+
+
+async def _store_file(
+    db: AsyncSession,
+    current_user,
+    file_uuid: uuid.UUID,
+    fields: dict,
+    rows: list[dict],
+    store: BlobStore,
+    staged: StagedBlob,
+) -> File:
+    """Insert the file row and its index entries, then publish the blob."""
+    try:
+        new_file = File(
+            id=file_uuid,
+            owner_id=current_user.id,
+            size=staged.size,
+            **fields,
+        )
+        db.add(new_file)
+        try:
+            await db.flush()
+        except IntegrityError:
+            # Another upload with the same file ID won the race.
+            await db.rollback()
+            raise HTTPException(status_code=409, detail="File ID already exists")
+
+        if rows:
+            await db.execute(insert(IndexEntry), rows)
+
+        if store.commits_with_row:
+            await store.commit(staged, file_uuid)
+        setattr(new_file, "blob_ref", store.ref_for(staged, file_uuid))
+        await db.commit()
+    except BaseException:
+        await store.discard(staged)
+        raise
+
+    if not store.commits_with_row:
+        try:
+            await store.commit(staged, file_uuid)
+        except BaseException:
+            # Published blobs may be shared, so undo the row instead.
+            await store.discard(staged)
+            await db.execute(delete(IndexEntry).where(IndexEntry.file_id == file_uuid))
+            await db.delete(new_file)
+            await db.commit()
+            raise
 
-    for t in tokens:
-        token_b = base64.b64decode(t["token"])
+    await db.refresh(new_file)
+    return new_file
 
-        value_obj = t.get("value")
-        if (
-            not isinstance(value_obj, dict)
-            or "ciphertext_b64" not in value_obj
-            or "iv_b64" not in value_obj
-        ):
-            raise HTTPException(status_code=400, detail="Invalid token value format")
 
-        value_json = json.dumps(value_obj).encode()
+# ----------------------------
+# Resumable upload sessions
+# ----------------------------
+async def _get_upload_session(
+    db: AsyncSession, upload_id: uuid.UUID, current_user, lock: bool = False
+) -> UploadSession:
+    """Fetch the caller's live session; ``lock`` holds its row until commit."""
+    session = await db.get(
+        UploadSession, upload_id, with_for_update=lock, populate_existing=lock
+    )
+    if not session or session.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    if session.expires_at < datetime.now(session.expires_at.tzinfo):
+        raise HTTPException(status_code=410, detail="Upload session expired")
+    return session
 
-        prev_b = base64.b64decode(t["prev_token"]) if t.get("prev_token") else None
 
-        db.add(
-            IndexEntry(
-                token=token_b,
-                owner_id=current_user.id,
-                value=value_json,  # JSON-encoded ciphertext+iv
-                prev_token=prev_b,
+async def _upload_session_read(
+    db: AsyncSession, session: UploadSession
+) -> UploadSessionRead:
+    result = await db.execute(
+        select(UploadPart)
+        .where(UploadPart.session_id == session.id)
+        .order_by(UploadPart.part_number)
+    )
+    return UploadSessionRead(
+        id=getattr(session, "id"),
+        file_id=getattr(session, "file_id"),
+        expires_at=getattr(session, "expires_at"),
+        max_part_size=settings.upload_part_max_size,
+        parts=[
+            UploadPartRead(
+                part_number=getattr(p, "part_number"),
+                size=getattr(p, "size"),
+                sha256=getattr(p, "sha256"),
             )
+            for p in result.scalars().all()
+        ],
+    )
+
+
+@router.post("/uploads", response_model=UploadSessionRead)
+async def create_upload_session(
+    payload: UploadSessionCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    existing = await db.get(File, payload.file_id)
+    if existing:
+        raise HTTPException(status_code=409, detail="File ID already exists")
+    result = await db.execute(
+        select(UploadSession.id).where(UploadSession.file_id == payload.file_id)
+    )
+    if result.scalar_one_or_none():
+        raise HTTPException(
+            status_code=409, detail="An upload session for this file already exists"
+        )
+
+    fields = _decode_upload_fields(
+        payload.metadata_ciphertext,
+        payload.metadata_iv,
+        payload.encrypted_kf_b64,
+        payload.encrypted_kf_iv,
+        payload.file_iv,
+    )
+    # Sessions keep the raw tokens; their rows are built on completion.
+    tokens, _ = _parse_tokens_json(
+        payload.tokens_json, current_user.id, payload.file_id
+    )
+
+    session = UploadSession(
+        owner_id=current_user.id,
+        file_id=payload.file_id,
+        tokens=tokens,
+        expires_at=datetime.now() + timedelta(hours=settings.upload_session_ttl_hours),
+        **fields,
+    )
+    db.add(session)
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(
+            status_code=409, detail="An upload session for this file already exists"
         )
+    await db.refresh(session)
+    return await _upload_session_read(db, session)
 
+
+@router.get("/uploads/{upload_id}", response_model=UploadSessionRead)
+async def get_upload_session(
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    session = await _get_upload_session(db, upload_id, current_user)
+    return await _upload_session_read(db, session)
+
+
+@router.put("/uploads/{upload_id}/parts/{part_number}", response_model=UploadPartRead)
+async def upload_part(
+    request: Request,
+    upload_id: uuid.UUID,
+    part_number: int = Path(..., ge=1, le=10000),
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    await _get_upload_session(db, upload_id, current_user)
+    # Don't keep a pooled connection idle in transaction while the part
+    # streams in; the locked re-fetch below checks the session again.
     await db.commit()
-    await db.refresh(new_file)
+
+    try:
+        size, sha256 = await upload_parts.write(
+            upload_id, part_number, request.stream(), settings.upload_part_max_size
+        )
+    except PartTooLarge:
+        raise HTTPException(status_code=413, detail="Upload part too large")
+
+    # The part is streamed without holding the row lock, so parts can upload
+    # in parallel; recording it waits for a running complete or abort.
+    try:
+        session = await _get_upload_session(db, upload_id, current_user, lock=True)
+    except HTTPException as e:
+        if e.status_code == 404:
+            # Completed or aborted meanwhile; don't leave the part behind.
+            await upload_parts.delete(upload_id)
+        raise
+
+    stmt = pg_insert(UploadPart).values(
+        session_id=upload_id, part_number=part_number, size=size, sha256=sha256
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UploadPart.session_id, UploadPart.part_number],
+            set_={"size": size, "sha256": sha256, "created_at": datetime.now()},
+        )
+    )
+    setattr(
+        session,
+        "expires_at",
+        datetime.now() + timedelta(hours=settings.upload_session_ttl_hours),
+    )
+    await db.commit()
+
+    return UploadPartRead(part_number=part_number, size=size, sha256=sha256)
+
+
+@router.post("/uploads/{upload_id}/complete", response_model=FileUploadResponse)
+@audit_event("file_upload")
+async def complete_upload_session(
+    request: Request,
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    # Held until the file is stored, so concurrent completes, part uploads and
+    # aborts of this session wait for it and then find it gone.
+    session = await _get_upload_session(db, upload_id, current_user, lock=True)
+
+    result = await db.execute(
+        select(UploadPart.part_number)
+        .where(UploadPart.session_id == upload_id)
+        .order_by(UploadPart.part_number)
+    )
+    part_numbers = list(result.scalars().all())
+    if not part_numbers:
+        raise HTTPException(status_code=400, detail="No parts uploaded")
+    if part_numbers != list(range(1, len(part_numbers) + 1)):
+        raise HTTPException(status_code=400, detail="Upload parts are not contiguous")
+
+    existing = await db.get(File, session.file_id)
+    if existing:
+        raise HTTPException(status_code=409, detail="File ID already exists")
+
+    fields = {name: getattr(session, name) for name in UPLOAD_FIELDS}
+    file_uuid = getattr(session, "file_id")
+    tokens = list(session.tokens or [])  # type: ignore
+    rows = index_rows(tokens, current_user.id, file_uuid)
+
+    store = get_blob_store(db)
+    staged = await store.stage(upload_parts.iter_parts(upload_id, part_numbers))
+
+    await db.delete(session)
+    new_file = await _store_file(
+        db, current_user, file_uuid, fields, rows, store, staged
+    )
+    await upload_parts.delete(upload_id)
+
     return FileUploadResponse(
         id=getattr(new_file, "id"),
         created_at=getattr(new_file, "created_at"),
     )
 
 
+@router.delete("/uploads/{upload_id}", response_model=dict)
+async def abort_upload_session(
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    session = await db.get(UploadSession, upload_id, with_for_update=True)
+    if not session or session.owner_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+
+    await db.delete(session)
+    await db.commit()
+    await upload_parts.delete(upload_id)
+
+    return {"aborted": True, "upload_id": str(upload_id)}
+
+
+def _b64_or_none(value: bytes | None) -> str | None:
+    return base64.b64encode(value).decode() if value is not None else None
+
+
 # ----------------------------
 # List all files (owned + shared)
 # ----------------------------
@@ -113,77 +411,99 @@ async def list_files(
     current_user=Depends(get_current_user),
     limit: int = Query(50, ge=1, le=100),
     offset: int = Query(0, ge=0),
+    cursor: str | None = Query(None),
 ):
-    owned_q = await db.execute(
-        select(File, User.email)
-        .join(User, File.owner_id == User.id)
-        .where(File.owner_id == current_user.id, File.deleted.is_(False))
-    )
-    owned_files = owned_q.all()
-
-    shared_q = await db.execute(
-        select(File, User.email, FileShare)
-        .join(User, File.owner_id == User.id)
+    no_bytes = null().cast(LargeBinary)
+
+    owned = select(
+        File.id,
+        File.owner_id,
+        File.metadata_ciphertext,
+        File.metadata_iv,
+        File.encrypted_kf,
+        File.encrypted_kf_iv,
+        no_bytes.label("wrapped_key"),
+        File.created_at,
+        File.deleted,
+        false().label("is_shared_file"),
+    ).where(File.owner_id == current_user.id, File.deleted.is_(False))
+
+    shared = (
+        select(
+            File.id,
+            File.owner_id,
+            File.metadata_ciphertext,
+            File.metadata_iv,
+            no_bytes.label("encrypted_kf"),
+            no_bytes.label("encrypted_kf_iv"),
+            FileShare.wrapped_key,
+            File.created_at,
+            File.deleted,
+            true().label("is_shared_file"),
+        )
         .join(FileShare, FileShare.file_id == File.id)
         .where(FileShare.recipient_user_id == current_user.id, File.deleted.is_(False))
     )
-    shared_files = shared_q.all()
 
-    combined = []
+    listing = union_all(owned, shared).subquery()
 
-    for f, owner_email in owned_files:
-        shared_entries = await db.execute(
-            select(User.email)
-            .join(FileShare, FileShare.recipient_user_id == User.id)
-            .where(FileShare.file_id == f.id)
-        )
-        shared_emails = [row[0] for row in shared_entries.all()]
+    shared_with = (
+        select(func.array_agg(User.email))
+        .join(FileShare, FileShare.recipient_user_id == User.id)
+        .where(FileShare.file_id == listing.c.id, listing.c.is_shared_file.is_(False))
+        .correlate(listing)
+        .scalar_subquery()
+    )
 
-        combined.append(
-            {
-                "id": str(f.id),
-                "owner_email": owner_email,
-                "metadata_ciphertext": base64.b64encode(
-                    f.metadata_ciphertext or b""
-                ).decode(),
-                "metadata_iv": base64.b64encode(f.metadata_iv or b"").decode(),
-                "encrypted_kf_b64": base64.b64encode(f.encrypted_kf or b"").decode(),
-                "encrypted_kf_iv": base64.b64encode(f.encrypted_kf_iv or b"").decode(),
-                "wrapped_key_b64": None,
-                "created_at": f.created_at,
-                "deleted": bool(f.deleted),
-                "shared_with": shared_emails,
-                "is_shared_file": False,
-            }
-        )
+    page_q = (
+        select(listing, User.email.label("owner_email"), shared_with.label("shared"))
+        .join(User, User.id == listing.c.owner_id)
+        .order_by(listing.c.created_at.desc(), listing.c.id.desc())
+        .limit(limit)
+    )
 
-    for f, owner_email, share in shared_files:
-        combined.append(
-            {
-                "id": str(f.id),
-                "owner_email": owner_email,
-                "metadata_ciphertext": base64.b64encode(
-                    f.metadata_ciphertext or b""
-                ).decode(),
-                "metadata_iv": base64.b64encode(f.metadata_iv or b"").decode(),
-                "encrypted_kf_b64": None,
-                "encrypted_kf_iv": None,
-                "wrapped_key_b64": base64.b64encode(share.wrapped_key or b"").decode(),
-                "created_at": f.created_at,
-                "deleted": bool(f.deleted),
-                "shared_with": [],
-                "is_shared_file": True,
-            }
+    total = None
+    if cursor:
+        created_at, file_id = decode_cursor(cursor, uuid.UUID)
+        page_q = page_q.where(
+            tuple_(listing.c.created_at, listing.c.id) < tuple_(created_at, file_id)
         )
-
-    combined.sort(key=lambda x: x["created_at"], reverse=True)
-    paginated = combined[offset : offset + limit]
+    else:
+        page_q = page_q.offset(offset)
+        total_q = await db.execute(select(func.count()).select_from(listing))
+        total = total_q.scalar_one()
+
+    rows = (await db.execute(page_q)).all()
+
+    paginated = [
+        {
+            "id": str(row.id),
+            "owner_email": row.owner_email,
+            "metadata_ciphertext": base64.b64encode(
+                row.metadata_ciphertext or b""
+            ).decode(),
+            "metadata_iv": base64.b64encode(row.metadata_iv or b"").decode(),
+            "encrypted_kf_b64": _b64_or_none(row.encrypted_kf),
+            "encrypted_kf_iv": _b64_or_none(row.encrypted_kf_iv),
+            "wrapped_key_b64": _b64_or_none(row.wrapped_key),
+            "created_at": row.created_at,
+            "deleted": bool(row.deleted),
+            "shared_with": row.shared or [],
+            "is_shared_file": bool(row.is_shared_file),
+        }
+        for row in rows
+    ]
+
+    next_cursor = None
+    if len(rows) == limit:
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
 
     return {
-        "total": len(combined),
+        "total": total,
         "count": len(paginated),
         "limit": limit,
         "offset": offset,
+        "next_cursor": next_cursor,
         "files": paginated,
     }
 
@@ -197,19 +517,40 @@ async def list_files_by_ids(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    ids = payload.ids
+    ids = list(dict.fromkeys(payload.ids))
     if not ids:
         raise HTTPException(status_code=400, detail="No file IDs provided")
+    if len(ids) > settings.file_batch_max_size:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many file IDs (max {settings.file_batch_max_size})",
+        )
 
     result = await db.execute(
-        select(File, User.email)
+        select(File, User.email, FileShare.wrapped_key)
         .join(User, File.owner_id == User.id)
-        .where(File.id.in_(ids), File.deleted.is_(False))
+        .outerjoin(
+            FileShare,
+            (FileShare.file_id == File.id)
+            & (FileShare.recipient_user_id == current_user.id),
+        )
+        .where(
+            File.id.in_(ids),
+            File.deleted.is_(False),
+            (File.owner_id == current_user.id) | FileShare.id.is_not(None),
+        )
     )
-    files = result.all()
+    files = {
+        f.id: (f, owner_email, wrapped_key)
+        for f, owner_email, wrapped_key in result.all()
+    }
 
     out = []
-    for f, owner_email in files:
+    for file_id in ids:
+        if file_id not in files:
+            continue
+        f, owner_email, wrapped_key = files[file_id]
+
         encrypted_kf_b64 = None
         encrypted_kf_iv = None
         wrapped_key_b64 = None
@@ -218,15 +559,7 @@ async def list_files_by_ids(
             encrypted_kf_b64 = base64.b64encode(f.encrypted_kf or b"").decode()
             encrypted_kf_iv = base64.b64encode(f.encrypted_kf_iv or b"").decode()
         else:
-            share_check = await db.execute(
-                select(FileShare).where(
-                    FileShare.file_id == f.id,
-                    FileShare.recipient_user_id == current_user.id,
-                )
-            )
-            share = share_check.scalar_one_or_none()
-            if share:
-                wrapped_key_b64 = base64.b64encode(share.wrapped_key or b"").decode()  # type: ignore
+            wrapped_key_b64 = base64.b64encode(wrapped_key or b"").decode()
 
         out.append(
             {
@@ -338,6 +671,8 @@ async def get_file(
         "owner_email": owner_email,
         "metadata_ciphertext": base64.b64encode(f.metadata_ciphertext or b"").decode(),
         "metadata_iv": base64.b64encode(f.metadata_iv or b"").decode(),
+        "file_iv": base64.b64encode(f.file_iv or b"").decode(),
+        "size": f.size,
         "encrypted_kf_b64": encrypted_kf_b64,
         "encrypted_kf_iv": encrypted_kf_iv,
         "wrapped_key_b64": wrapped_key_b64,
@@ -347,34 +682,21 @@ async def get_file(
     }
 
 
-# ----------------------------
-# Download file (with key info)
-# ----------------------------
-@router.get("/{file_id}/download", response_model=dict)
-@audit_event("file_download")
-async def download_file(
-    request: Request,
-    file_id: str,
-    db: AsyncSession = Depends(get_db),
-    current_user=Depends(get_current_user),
-):
-    result = await db.execute(
-        select(File, User.email)
-        .join(User, File.owner_id == User.id)
-        .where(File.id == file_id)
-    )
-    entry = result.first()
-    if not entry:
+async def _get_file_with_keys(db: AsyncSession, file_id: str, current_user):
+    result = await db.execute(select(File).where(File.id == file_id))
+    f = result.scalar_one_or_none()
+    if not f:
         raise HTTPException(status_code=404, detail="File not found")
 
-    f, _ = entry
-    encrypted_kf_b64 = None
-    encrypted_kf_iv = None
-    wrapped_key_b64 = None
+    keys = {
+        "encrypted_kf_b64": None,
+        "encrypted_kf_iv": None,
+        "wrapped_key_b64": None,
+    }
 
     if f.owner_id == current_user.id:
-        encrypted_kf_b64 = base64.b64encode(f.encrypted_kf or b"").decode()
-        encrypted_kf_iv = base64.b64encode(f.encrypted_kf_iv or b"").decode()
+        keys["encrypted_kf_b64"] = base64.b64encode(f.encrypted_kf or b"").decode()
+        keys["encrypted_kf_iv"] = base64.b64encode(f.encrypted_kf_iv or b"").decode()
     else:
         share_check = await db.execute(
             select(FileShare).where(
@@ -385,21 +707,129 @@ async def download_file(
         share = share_check.scalar_one_or_none()
         if not share:
             raise HTTPException(status_code=403, detail="Access denied")
-        wrapped_key_b64 = base64.b64encode(share.wrapped_key or b"").decode()  # type: ignore
+        keys["wrapped_key_b64"] = base64.b64encode(share.wrapped_key or b"").decode()  # type: ignore
+
+    return f, keys
+
+
+# ----------------------------
+# Download file (with key info)
+# ----------------------------
+@router.get("/{file_id}/download", response_model=dict)
+@audit_event("file_download")
+async def download_file(
+    request: Request,
+    file_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    f, keys = await _get_file_with_keys(db, file_id, current_user)
+
+    store, blob_key = resolve_blob(db, f)
+    ciphertext = await store.read(blob_key)
 
     return {
         "id": str(f.id),
-        "ciphertext": base64.b64encode(f.ciphertext or b"").decode(),
+        "ciphertext": base64.b64encode(ciphertext).decode(),
         "file_iv": base64.b64encode(f.file_iv or b"").decode(),
         "metadata_ciphertext": base64.b64encode(f.metadata_ciphertext or b"").decode(),
         "metadata_iv": base64.b64encode(f.metadata_iv or b"").decode(),
-        "encrypted_kf_b64": encrypted_kf_b64,
-        "encrypted_kf_iv": encrypted_kf_iv,
-        "wrapped_key_b64": wrapped_key_b64,
+        **keys,
         "created_at": f.created_at,
     }
 
 
+def _parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """Resolve a single ``bytes=`` range to an encrypted-chunk-aligned span.
+
+    Returns inclusive ``(start, end)`` offsets widened outwards to
+    ``CIPHERTEXT_CHUNK_SIZE`` boundaries so every byte served belongs to a
+    whole AES-GCM chunk the client can decrypt. Returns ``None`` when the
+    header should be ignored and the full body sent.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            start = max(size - int(last), 0)
+            end = size - 1
+    except ValueError:
+        return None
+
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+
+    chunk = settings.ciphertext_chunk_size
+    start = start // chunk * chunk
+    end = min((end // chunk + 1) * chunk, size) - 1
+    return start, end
+
+
+# ----------------------------
+# Download raw ciphertext (streamed)
+# ----------------------------
+@router.get("/{file_id}/content", response_class=StreamingResponse)
+@audit_event("file_download")
+async def download_file_content(
+    request: Request,
+    file_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    f, keys = await _get_file_with_keys(db, file_id, current_user)
+
+    store, blob_key = resolve_blob(db, f)
+    size = f.size if f.size is not None else await store.size(blob_key)
+
+    size = int(size)
+    start, end = 0, size - 1
+    status_code = 200
+    headers = {
+        "Accept-Ranges": "bytes",
+        "X-File-IV": base64.b64encode(f.file_iv or b"").decode(),
+    }
+
+    range_header = request.headers.get("Range")
+    if range_header and size > 0:
+        span = _parse_range(range_header, size)
+        if span:
+            start, end = span
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    for header, value in (
+        ("X-Encrypted-Kf", keys["encrypted_kf_b64"]),
+        ("X-Encrypted-Kf-IV", keys["encrypted_kf_iv"]),
+        ("X-Wrapped-Key", keys["wrapped_key_b64"]),
+    ):
+        if value is not None:
+            headers[header] = value
+
+    # The session is only torn down after the whole body is sent; unless the
+    # ciphertext streams from Postgres, end the transaction so a long
+    # download doesn't hold a pooled connection.
+    if not isinstance(store, PostgresBlobStore):
+        await db.commit()
+
+    return StreamingResponse(
+        store.iter_chunks(blob_key, start, end + 1),
+        status_code=status_code,
+        media_type="application/octet-stream",
+        headers=headers,
+    )
+
+
 # ----------------------------
 # Delete file (soft delete)
 # ----------------------------
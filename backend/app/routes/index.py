@@ -0,0 +1,115 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.audit_decorator import audit_event
+from app.core.deps import get_current_user
+from app.core.index_entries import compact_index, index_rows, upsert_index_rows
+from app.db import get_db
+from app.models import File
+
+router = APIRouter(prefix="/index", tags=["index"])
+
+
+async def _ndjson_lines(request: Request):
+    max_size = settings.index_bulk_max_line_size
+    buffer = bytearray()
+    async for chunk in request.stream():
+        # Bytes already buffered hold no newline, so only the new chunk is
+        # searched.
+        search_from = len(buffer)
+        buffer += chunk
+        line_start = 0
+        while (end := buffer.find(b"\n", search_from)) != -1:
+            if end - line_start > max_size:
+                break
+            yield bytes(buffer[line_start:end])
+            line_start = search_from = end + 1
+        del buffer[:line_start]
+        # Whatever is left starts with an unfinished or oversized line.
+        if len(buffer) > max_size:
+            raise HTTPException(
+                status_code=413, detail=f"Line too large (max {max_size} bytes)"
+            )
+    if buffer:
+        yield bytes(buffer)
+
+
+@router.post("/entries", response_model=dict)
+@audit_event("index_update")
+async def bulk_update_index(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Upsert index entries streamed as NDJSON, one token object per line.
+
+    Each line has the same shape as an entry of ``tokens_json`` on upload,
+    plus an optional ``file_id`` of one of the caller's files.
+    Entries are written in batches of ``INDEX_BULK_BATCH_SIZE``, each in its
+    own transaction; on a bad line the batches before it stay committed.
+    """
+    committed = 0
+    batches = 0
+    batch: list[dict] = []
+    line_no = 0
+
+    async def flush():
+        nonlocal committed, batches
+        file_ids = {r["file_id"] for r in batch if r["file_id"]}
+        if file_ids:
+            result = await db.execute(
+                select(File.id).where(
+                    File.id.in_(file_ids), File.owner_id == current_user.id
+                )
+            )
+            if len(result.scalars().all()) != len(file_ids):
+                await db.rollback()
+                raise HTTPException(
+                    status_code=400,
+                    detail={"error": "Unknown file_id", "committed": committed},
+                )
+
+        count = await upsert_index_rows(db, batch)
+        await db.commit()
+        committed += count
+        batches += 1
+        batch.clear()
+
+    async for line in _ndjson_lines(request):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            batch.extend(index_rows([json.loads(line)], current_user.id))
+        except (HTTPException, ValueError) as e:
+            await db.rollback()
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": getattr(e, "detail", "Invalid JSON"),
+                    "line": line_no,
+                    "committed": committed,
+                },
+            )
+
+        if len(batch) >= settings.index_bulk_batch_size:
+            await flush()
+
+    if batch:
+        await flush()
+
+    return {"upserted": committed, "batches": batches}
+
+
+@router.post("/compact", response_model=dict)
+@audit_event("index_compact")
+async def compact_my_index(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    return await compact_index(db, current_user.id)
@@ -1,14 +1,17 @@
 import base64
-from typing import Any
+import json
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import settings
 from app.core.deps import get_current_user
+from app.core.index_chain import index_chain
+from app.core.index_entries import expand_values
 from app.db import get_db
-from app.models import IndexEntry
-from app.schemas import SearchToken
+from app.schemas import SearchBatch, SearchToken
 
 router = APIRouter(prefix="/search", tags=["search"])
 
@@ -23,23 +26,111 @@ async def search(
     if not token:
         raise HTTPException(status_code=400, detail="Missing token")
 
-    current_token = base64.b64decode(token)
-    visited: set[bytes] = set()
+    # Every hop holds at least one value, so ``limit`` hops are enough.
+    chain = index_chain(current_user.id, [base64.b64decode(token)], payload.limit)
+    result = await db.execute(
+        select(chain.c.token, chain.c.value, chain.c.prev_token).order_by(chain.c.depth)
+    )
+
     values: list[str] = []
+    # Resume point: the entry to search next and how many of its values the
+    # page already returned (compacted entries hold many).
+    next_token, next_offset = None, 0
+    offset = payload.offset
+    for row in result.all():
+        entry_values = expand_values(row.value)
+        if payload.limit is not None:
+            room = payload.limit - len(values)
+            if room <= 0:
+                next_token, next_offset = row.token, offset
+                break
+            if len(entry_values) - offset > room:
+                values.extend(entry_values[offset : offset + room])
+                next_token, next_offset = row.token, offset + room
+                break
+        values.extend(entry_values[offset:])
+        next_token, next_offset = row.prev_token, 0
+        offset = 0
+
+    response: dict = {"values": values, "count": len(values)}
+    if payload.limit is not None:
+        response["next_token"] = (
+            base64.b64encode(next_token).decode() if next_token else None
+        )
+        response["next_offset"] = next_offset
+    return response
+
+
+@router.post("/stream")
+async def search_stream(
+    payload: SearchToken,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    token = payload.token
+    if not token:
+        raise HTTPException(status_code=400, detail="Missing token")
 
-    while bool(current_token) and current_token not in visited:
-        visited.add(current_token)
-        result = await db.execute(
-            select(IndexEntry).where(
-                IndexEntry.token == current_token,
-                IndexEntry.owner_id == current_user.id,
-            )
+    chain = index_chain(current_user.id, [base64.b64decode(token)], payload.limit)
+    query = (
+        select(chain.c.value)
+        .order_by(chain.c.depth)
+        .execution_options(yield_per=settings.search_stream_batch_size)
+    )
+
+    async def lines():
+        sent = 0
+        offset = payload.offset
+        result = await db.stream_scalars(query)
+        try:
+            async for value in result:
+                for v in expand_values(value)[offset:]:
+                    if payload.limit is not None and sent >= payload.limit:
+                        return
+                    sent += 1
+                    yield json.dumps({"value": v}) + "\n"
+                offset = 0
+        finally:
+            await result.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.post("/batch")
+async def search_batch(
+    payload: SearchBatch,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    if not payload.tokens:
+        raise HTTPException(status_code=400, detail="Missing tokens")
+    if len(payload.tokens) > settings.search_batch_max_tokens:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many tokens (max {settings.search_batch_max_tokens})",
         )
-        entry: Any = result.scalar_one_or_none()
-        if not entry:
-            break
-        value_json = entry.value.decode()
-        values.append(value_json)
-        current_token = getattr(entry, "prev_token")
-
-    return {"values": values, "count": len(values)}
+
+    try:
+        roots = {base64.b64decode(t): t for t in payload.tokens}
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid token")
+
+    chain = index_chain(current_user.id, roots)
+    result = await db.execute(select(chain.c.root, chain.c.value, chain.c.depth))
+    position = {root: i for i, root in enumerate(roots)}
+    rows = sorted(result.all(), key=lambda r: (position[r.root], r.depth))
+
+    # Every keyword chain points at the same encrypted file id, so equal
+    # values across chains mean the same file.
+    matches: dict[str, list[str]] = {}
+    for root, value, _ in rows:
+        for v in expand_values(value):
+            tags = matches.setdefault(v, [])
+            if roots[root] not in tags:
+                tags.append(roots[root])
+
+    if payload.mode == "and":
+        matches = {v: tags for v, tags in matches.items() if len(tags) == len(roots)}
+
+    values = [{"value": v, "tokens": tags} for v, tags in matches.items()]
+    return {"mode": payload.mode, "values": values, "count": len(values)}
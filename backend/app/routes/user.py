@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.deps import get_current_user
 from app.db import get_db
+from app.models import User
 
 router = APIRouter(prefix="/user", tags=["user"])
 
@@ -24,9 +26,16 @@ async def update_index_state(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    current_user.index_state_ciphertext = payload.index_state_ciphertext.encode()
-    current_user.index_state_iv = payload.index_state_iv.encode()
-
+    # current_user may come from the auth cache and is not attached to this
+    # session, so write through an explicit UPDATE.
+    await db.execute(
+        update(User)
+        .where(User.id == current_user.id)
+        .values(
+            index_state_ciphertext=payload.index_state_ciphertext.encode(),
+            index_state_iv=payload.index_state_iv.encode(),
+        )
+    )
     await db.commit()
     return {"updated": True}
 
@@ -36,15 +45,15 @@ async def get_index_state(
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
+    result = await db.execute(
+        select(User.index_state_ciphertext, User.index_state_iv).where(
+            User.id == current_user.id
+        )
+    )
+    index_state_ciphertext, index_state_iv = result.one()
     return IndexStateResponse(
         index_state_ciphertext=(
-            current_user.index_state_ciphertext.decode()
-            if current_user.index_state_ciphertext
-            else None
-        ),
-        index_state_iv=(
-            current_user.index_state_iv.decode()
-            if current_user.index_state_iv
-            else None
+            index_state_ciphertext.decode() if index_state_ciphertext else None
         ),
+        index_state_iv=index_state_iv.decode() if index_state_iv else None,
     )
@@ -1,7 +1,8 @@
 from datetime import datetime
+from typing import Literal
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 
 
 class RegisterPayload(BaseModel):
@@ -52,6 +53,30 @@ class FileUploadResponse(BaseModel):
     created_at: datetime
 
 
+class UploadSessionCreate(BaseModel):
+    file_id: UUID
+    metadata_ciphertext: str
+    metadata_iv: str
+    tokens_json: str
+    encrypted_kf_b64: str
+    encrypted_kf_iv: str
+    file_iv: str
+
+
+class UploadPartRead(BaseModel):
+    part_number: int
+    size: int
+    sha256: str
+
+
+class UploadSessionRead(BaseModel):
+    id: UUID
+    file_id: UUID
+    expires_at: datetime
+    max_part_size: int
+    parts: list[UploadPartRead] = []
+
+
 class SharedUser(BaseModel):
     email: str
 
@@ -112,6 +137,14 @@ class FileShareRevoke(BaseModel):
 
 class SearchToken(BaseModel):
     token: str
+    limit: int | None = Field(None, ge=1, le=10000)
+    # Values of the entry at ``token`` to skip, from a previous page's cursor.
+    offset: int = Field(0, ge=0)
+
+
+class SearchBatch(BaseModel):
+    tokens: list[str]
+    mode: Literal["and", "or"] = "or"
 
 
 class BackupRead(BaseModel):
@@ -4,6 +4,7 @@ import os
 import sys
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 
@@ -44,15 +45,24 @@ def step_ok(ok):
     print(f"{GREEN}✅ OK{RESET}" if ok else f"{RED}❌ FAIL{RESET}")
 
 
-def register_user(email):
-    hr(f"Register {email}")
-    payload = {
+def register_payload(email):
+    return {
         "email": email,
         "password": "password123",
+        "password_salt_b64": gen_b64(16),
+        "enc_master_key_b64": gen_b64(),
+        "enc_master_key_iv": gen_b64(12),
+        "enc_search_key_b64": gen_b64(),
+        "enc_search_key_iv": gen_b64(12),
+        "enc_private_key_b64": gen_b64(),
+        "enc_private_key_iv": gen_b64(12),
         "public_key_b64": gen_b64(),
-        "encrypted_private_key_b64": gen_b64(),
     }
-    r = requests.post(f"{BASE}/auth/register", json=payload)
+
+
+def register_user(email):
+    hr(f"Register {email}")
+    r = requests.post(f"{BASE}/auth/register", json=register_payload(email))
     pretty(r)
     step_ok(r.status_code == 200)
     return r
@@ -70,24 +80,32 @@ def login(email):
     sys.exit(1)
 
 
-def upload_file(token):
-    hr("Upload File")
-    file_id = str(uuid.uuid4())
-    metadata_ciphertext = gen_b64()
-    encrypted_kf_b64 = gen_b64()
+def upload_form():
     tokens_json = json.dumps(
-        [{"token": gen_b64(8), "value": gen_b64(8), "prev_token": None}]
+        [
+            {
+                "token": gen_b64(8),
+                "value": {"ciphertext_b64": gen_b64(8), "iv_b64": gen_b64(12)},
+                "prev_token": None,
+            }
+        ]
     )
-
-    files = {"file": ("test.txt", b"Hello encrypted world!")}
-
     data = {
-        "file_id": file_id,
-        "metadata_ciphertext": metadata_ciphertext,
-        "encrypted_kf_b64": encrypted_kf_b64,
+        "file_id": str(uuid.uuid4()),
+        "metadata_ciphertext": gen_b64(),
+        "metadata_iv": gen_b64(12),
+        "encrypted_kf_b64": gen_b64(),
+        "encrypted_kf_iv": gen_b64(12),
+        "file_iv": gen_b64(12),
         "tokens_json": tokens_json,
     }
+    files = {"file": ("test.txt", b"Hello encrypted world!")}
+    return data, files
 
+
+def upload_file(token):
+    hr("Upload File")
+    data, files = upload_form()
     r = requests.post(
         f"{BASE}/files/upload",
         files=files,
@@ -99,7 +117,7 @@ def upload_file(token):
     step_ok(r.status_code == 200)
 
     if r.ok:
-        return r.json()["id"], json.loads(tokens_json)
+        return r.json()["id"], json.loads(data["tokens_json"])
 
     sys.exit(1)
 
@@ -134,7 +152,7 @@ def revoke_share(token, file_id, recipient_email):
         "file_id": file_id,
         "recipient_email": recipient_email,
     }
-    r = requests.delete(f"{BASE}/shares", json=payload, headers=auth_header(token))
+    r = requests.post(f"{BASE}/shares/revoke", json=payload, headers=auth_header(token))
     pretty(r)
     step_ok(r.status_code == 200)
 
@@ -177,6 +195,96 @@ def delete_file(token, file_id):
     step_ok(r.status_code == 200)
 
 
+def list_files_query_count(n=20):
+    """Listing files must cost the same number of SQL statements for 2 or N.
+
+    Runs the app in-process to count statements on its engine, so it needs
+    the same environment as the server.
+    """
+    hr(f"List Files Query Count (2 vs {n} files)")
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+
+    from app.db import engine
+    from app.main import app
+
+    statements = 0
+
+    def count(*args):
+        nonlocal statements
+        statements += 1
+
+    def listing_cost(client, headers):
+        nonlocal statements
+        statements = 0
+        r = client.get("/files", headers=headers)
+        assert r.status_code == 200, r.text
+        return statements
+
+    with TestClient(app) as client:
+        tokens = []
+        for name in ("owner", "recipient"):
+            email = f"{name}-{uuid.uuid4().hex[:8]}@example.com"
+            client.post("/auth/register", json=register_payload(email))
+            r = client.post(
+                "/auth/login", json={"email": email, "password": "password123"}
+            )
+            tokens.append((email, auth_header(r.json()["access_token"])))
+        (_, owner), (recipient_email, recipient) = tokens
+
+        def add_files(how_many):
+            for _ in range(how_many):
+                data, files = upload_form()
+                client.post("/files/upload", data=data, files=files, headers=owner)
+                client.post(
+                    "/shares",
+                    json={
+                        "file_id": data["file_id"],
+                        "recipient_email": recipient_email,
+                        "wrapped_key_b64": gen_b64(32),
+                        "permissions": "read",
+                    },
+                    headers=owner,
+                )
+
+        event.listen(engine.sync_engine, "before_cursor_execute", count)
+        try:
+            add_files(2)
+            # Warm the user cache so both measurements see the same path.
+            listing_cost(client, owner)
+            listing_cost(client, recipient)
+            few = listing_cost(client, owner), listing_cost(client, recipient)
+            add_files(n - 2)
+            many = listing_cost(client, owner), listing_cost(client, recipient)
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+    print(f"→ statements (owner, recipient): 2 files {few}, {n} files {many}")
+    step_ok(few == many)
+
+
+def stress_audit_chain(token, file_id, requests_count=300, workers=32):
+    hr(f"Audit Chain Under Load ({requests_count} parallel downloads)")
+
+    def download(_):
+        return requests.get(
+            f"{BASE}/files/{file_id}/download", headers=auth_header(token)
+        ).status_code
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        statuses = list(pool.map(download, range(requests_count)))
+    failed = [status for status in statuses if status != 200]
+    print(f"→ {requests_count - len(failed)}/{requests_count} downloads succeeded")
+
+    # Async audit writes may still be queued; give the writer a moment.
+    time.sleep(1)
+    r = requests.get(
+        f"{BASE}/audit/verify", params={"full": "true"}, headers=auth_header(token)
+    )
+    pretty(r)
+    step_ok(not failed and r.ok and r.json()["valid"])
+
+
 def run():
     print(f"{CYAN}\n=== VaultX Backend Full Test ==={RESET}")
     start = time.time()
@@ -195,6 +303,8 @@ def run():
 
     search_files(alice_token, tokens)
     download_file(bob_token, file_id)
+    stress_audit_chain(alice_token, file_id)
+    list_files_query_count()
 
     delete_file(alice_token, file_id)
     revoke_share(alice_token, file_id, "bob@example.com")